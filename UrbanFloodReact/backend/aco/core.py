@@ -48,10 +48,15 @@ class ACOEvacuationPlanner(BaseEvacuationPlanner):
                  rho: float      = 0.1,
                  q: float        = 100.0,
                  use_tomtom_traffic: bool = False,
+                 shared_setup=None,
+                 node_index=None,
+                 seed=None,
                  **kwargs):
 
         super().__init__(at_risk_nodes, safe_shelters, G,
-                         use_tomtom_traffic=use_tomtom_traffic)
+                         use_tomtom_traffic=use_tomtom_traffic,
+                         shared_setup=shared_setup, node_index=node_index,
+                         seed=seed)
 
         self.n_ants     = n_ants
         self.iterations = iterations
@@ -73,10 +78,6 @@ class ACOEvacuationPlanner(BaseEvacuationPlanner):
             eta = np.where(np.isinf(eta), 1e6, eta)
         self._eta = eta.astype(np.float64)
 
-        # Pre-compute population array and capacity array as numpy vectors
-        self._pops       = np.array([n['pop'] for n in at_risk_nodes], dtype=np.int64)
-        self._capacities = np.array([s['capacity'] for s in safe_shelters], dtype=np.int64)
-
     # ─────────────────────────────────────────────────────────────────────────
     # Main loop
     # ─────────────────────────────────────────────────────────────────────────
@@ -88,11 +89,12 @@ class ACOEvacuationPlanner(BaseEvacuationPlanner):
 
         n_risk     = len(self.at_risk_nodes)
         n_shelters = len(self.safe_shelters)
-        caps       = self._capacities          # shape (n_shelters,)
+        # Shared float64 columns from _build_columns (fractional pops kept)
+        caps       = self._caps                # shape (n_shelters,)
         pops       = self._pops                # shape (n_risk,)
 
         best_chromosome = np.array(self._greedy_chromosome, dtype=np.int32)
-        best_fitness    = self._fitness(best_chromosome.tolist())
+        best_fitness    = self._fitness(best_chromosome)
 
         # Pre-compute alpha/beta powers once — these don't change per iteration
         # (tau changes, but eta^beta is fixed)
@@ -105,42 +107,44 @@ class ACOEvacuationPlanner(BaseEvacuationPlanner):
             # Base attractiveness for all nodes and shelters at once
             attract = tau_alpha * eta_beta         # (n_risk, n_shelters)
 
-            iter_chromosomes = np.empty((self.n_ants, n_risk), dtype=np.int32)
-            iter_fitness     = np.empty(self.n_ants, dtype=np.float64)
-
-            for ant in range(self.n_ants):
-                chromosome    = np.empty(n_risk, dtype=np.int32)
-                demand_counts = np.zeros(n_shelters, dtype=np.int64)
-
-                for i in range(n_risk):
-                    pop    = pops[i]
-                    scores = attract[i].copy()
-
-                    # ── Vectorised capacity mask ──────────────────────────────
-                    # Zero out any shelter where adding this node's pop would overflow
-                    over_capacity = (demand_counts + pop) > caps
-                    scores[over_capacity] = 0.0
-
-                    total = scores.sum()
-                    if total <= 0.0:
-                        # All shelters full — fall back to least-loaded
-                        load_ratio = demand_counts / np.maximum(caps, 1)
-                        j = int(np.argmin(load_ratio))
-                    else:
-                        # Roulette-wheel selection (vectorised normalisation)
-                        probs = scores / total
-                        j = int(np.random.choice(n_shelters, p=probs))
-
-                    chromosome[i]     = j
-                    demand_counts[j] += pop
-
-                fit = self._fitness(chromosome.tolist())
-                iter_chromosomes[ant] = chromosome
-                iter_fitness[ant]     = fit
-
-                if fit < best_fitness:
-                    best_fitness    = fit
-                    best_chromosome = chromosome.copy()
+            # All ants build their tours together: node by node, each step is
+            # one (n_ants, n_shelters) array operation instead of a Python
+            # loop per ant
+            iter_chromosomes = np.empty((self.n_ants, n_risk), dtype=self._shelter_index_dtype())
+            demand_counts    = np.zeros((self.n_ants, n_shelters), dtype=np.float64)
+            ants             = np.arange(self.n_ants)
+            # One roulette draw per (node, ant) for the whole iteration
+            draws            = self._rng.random((n_risk, self.n_ants))
+
+            for i in range(n_risk):
+                pop = pops[i]
+
+                # ── Vectorised capacity mask ──────────────────────────────────
+                # Zero out any shelter where adding this node's pop would overflow
+                scores = np.where(demand_counts + pop > caps, 0.0, attract[i])
+                total  = scores.sum(axis=1)
+
+                # Roulette-wheel selection: first shelter whose cumulative
+                # score passes a uniform draw scaled to each ant's total
+                cum = np.cumsum(scores, axis=1)
+                r   = draws[i] * total
+                j   = np.minimum((cum <= r[:, None]).sum(axis=1), n_shelters - 1)
+
+                full = total <= 0.0
+                if full.any():
+                    # All shelters full — fall back to least-loaded
+                    load_ratio = demand_counts[full] / np.maximum(caps, 1)
+                    j[full] = np.argmin(load_ratio, axis=1)
+
+                iter_chromosomes[:, i]  = j
+                demand_counts[ants, j] += pop
+
+            # Score the whole colony in one batch
+            iter_fitness = self._fitness_batch(iter_chromosomes)
+            best_ant = int(np.argmin(iter_fitness))
+            if iter_fitness[best_ant] < best_fitness:
+                best_fitness    = float(iter_fitness[best_ant])
+                best_chromosome = iter_chromosomes[best_ant].copy()
 
             # ── Pheromone update ──────────────────────────────────────────────
             # 1. Evaporation (in-place, vectorised)
@@ -22,11 +22,10 @@ service.py can swap planners transparently.
 """
 
 import os
-import math
 import copy
+from functools import partial
 import numpy as np
 import networkx as nx
-from collections import defaultdict
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -34,6 +33,7 @@ load_dotenv()
 # Reuse the existing setup_mixin & geometry_mixin from the GA package
 from genetic_algorithm.setup_mixin import SetupMixin
 from genetic_algorithm.geometry_mixin import GeometryMixin
+from genetic_algorithm.evolution_mixin import population_fitness
 
 
 class BaseEvacuationPlanner(SetupMixin, GeometryMixin):
@@ -49,29 +49,50 @@ class BaseEvacuationPlanner(SetupMixin, GeometryMixin):
     TRAFFIC_PENALTY_FACTOR = 3.0
     TOMTOM_API_KEY       = os.getenv("TOMTOM_API_KEY")
 
+    # Derived state taken over from a shared_setup planner when present
+    SHARED_CACHES = ('_link_cost', '_node_index', '_edge_table', '_csr_cache', '_route_trees',
+                     '_snapped_nodes', '_node_tree', '_segment_cache', '_shelter_order')
+
     def __init__(self, at_risk_nodes, safe_shelters, G,
-                 use_tomtom_traffic: bool = False, shared_setup=None):
+                 use_tomtom_traffic: bool = False, shared_setup=None, node_index=None,
+                 seed=None):
         """
         at_risk_nodes : list[dict]  – {'id', 'pop', 'lat', 'lon'}
         safe_shelters : list[dict]  – {'id', 'node_id', 'capacity', 'lat', 'lon', ...}
         G             : NetworkX MultiDiGraph  (OSMnx road graph)
         use_tomtom_traffic : bool  – fetch real-time traffic if True
         shared_setup  : BaseEvacuationPlanner – another instance to copy matrices from
+        node_index    : dict – node → position in G.nodes() order, e.g. the flood
+                        simulator's, reused instead of re-indexing the graph
+        seed          : seed for the planner's NumPy Generator (None = fresh entropy)
         """
         self.at_risk_nodes      = at_risk_nodes
         self.safe_shelters      = safe_shelters
         self.G                  = G
         self.use_tomtom_traffic = use_tomtom_traffic
+        self._node_index        = node_index
+        # All ACO/PSO randomness is drawn from one PCG64 generator
+        self._rng               = np.random.default_rng(seed)
 
         n_risk     = len(at_risk_nodes)
         n_shelters = len(safe_shelters)
 
+        # Flat NumPy columns (pops, capacities, coordinates) for the hot paths
+        self._build_columns()
+
         if shared_setup:
-            # Skip heavy initialization
-            self.dist_matrix = copy.deepcopy(shared_setup.dist_matrix)
-            self.time_matrix = copy.deepcopy(shared_setup.time_matrix)
+            # Skip heavy initialization. The matrices are read-only once
+            # built, so they are shared by reference rather than deep-copied
+            self.dist_matrix = shared_setup.dist_matrix
+            self.time_matrix = shared_setup.time_matrix
             self._greedy_chromosome = copy.deepcopy(shared_setup._greedy_chromosome)
-            self.G = shared_setup.G  # share graph (which has flood/traffic weights)
+            self.G = shared_setup.G  # share graph (which has the traffic attributes)
+            # Reuse whatever the shared planner already derived: the fitness
+            # link-cost table, node index, CSR exports and the _decode caches
+            # (route trees, snapped nodes, node KD-tree, segment geometry)
+            for name in self.SHARED_CACHES:
+                if hasattr(shared_setup, name):
+                    setattr(self, name, getattr(shared_setup, name))
         else:
             # Step 0 – optional live traffic layer
             if self.use_tomtom_traffic:
@@ -88,42 +109,39 @@ class BaseEvacuationPlanner(SetupMixin, GeometryMixin):
             # Step 3 – greedy assignment (used as seed / heuristic by all planners)
             self._greedy_chromosome = self._compute_greedy_chromosome()
 
+        # Step 4 – per-gene fitness cost pop × (dist + 0.5 × time), with
+        # unreachable pairs priced at 1,000,000 up front so _fitness never branches
+        if getattr(self, '_link_cost', None) is None:
+            dist = np.where(np.isfinite(self.dist_matrix), self.dist_matrix, 1_000_000)
+            t    = np.where(np.isfinite(self.time_matrix), self.time_matrix, 1_000_000)
+            # Contiguous float32 like the GA's: the gather is memory-bound and
+            # population_fitness accumulates in float64
+            self._link_cost = np.ascontiguousarray((dist + 0.5 * t) * self._pops[:, None], dtype=np.float32)
+        # Fitness specialised once on the now-immutable arrays
+        self._score = partial(population_fitness, link_cost=self._link_cost, pops=self._pops,
+                              caps=self._caps, capacity_penalty=self.CAPACITY_PENALTY)
+
     # ─────────────────────────────────────────────────────────────────────────
     # Shared fitness (identical formula for fair comparison across algorithms)
     # ─────────────────────────────────────────────────────────────────────────
 
-    def _fitness(self, chromosome: list) -> float:
+    def _fitness(self, chromosome) -> float:
         """
         Multi-factor fitness (lower = better):
           total_dist  — flood-weighted network distance per person
           total_time  — raw travel time per person
           penalty     — quadratic capacity overflow penalty
         Returns a single scalar so all three planners are ranked on the
-        exact same objective.
+        exact same objective. `chromosome` may be a list or an int array.
         """
-        total_dist    = 0.0
-        total_time    = 0.0
-        shelter_counts = defaultdict(int)
-
-        for i, j in enumerate(chromosome):
-            pop  = self.at_risk_nodes[i]['pop']
-            dist = self.dist_matrix[i, j]
-            t    = self.time_matrix[i, j]
-
-            if not math.isfinite(dist): dist = 1_000_000
-            if not math.isfinite(t):    t    = 1_000_000
+        return float(self._fitness_batch(np.asarray(chromosome)[None])[0])
 
-            total_dist      += dist * pop
-            total_time      += t    * pop
-            shelter_counts[j] += pop
-
-        penalty = 0.0
-        for j, count in shelter_counts.items():
-            cap = self.safe_shelters[j]['capacity']
-            if count > cap:
-                penalty += ((count - cap) ** 2) * self.CAPACITY_PENALTY
-
-        return total_dist + 0.5 * total_time + penalty
+    def _fitness_batch(self, population) -> np.ndarray:
+        """
+        _fitness for every row of a (n, n_risk) int array in one 2D gather
+        and one offset bincount (the GA's population_fitness kernel).
+        """
+        return self._score(np.asarray(population, dtype=np.intp))
 
     # ─────────────────────────────────────────────────────────────────────────
     # run() must be implemented by each concrete planner
@@ -6,10 +6,10 @@ Each JSON is an array of {hobli_name, latitude, longitude}.
 Multiple rows per hobli_name are averaged (centroid).
 """
 
-import json
-from collections import defaultdict
 from pathlib import Path
 
+import pandas as pd
+
 
 def norm_key(name: str) -> str:
     """Normalise a hobli name to a stable lookup key.
@@ -23,31 +23,23 @@ def load_coords_from_json(path: Path, district: str) -> dict:
     """
     Returns: dict  norm_key → {lat, lon, original_name, district, num_points}
     """
-    with open(path, encoding="utf-8") as f:
-        records = json.load(f)
-
-    buckets: dict[str, list] = defaultdict(list)
-    names_map: dict[str, str] = {}
-
-    for r in records:
-        raw = r["hobli_name"]
-        key = norm_key(raw)
-        buckets[key].append((r["latitude"], r["longitude"]))
-        names_map[key] = raw  # last write wins for display name
-
-    result = {}
-    for key, coords in buckets.items():
-        lats = [c[0] for c in coords]
-        lons = [c[1] for c in coords]
-        n = len(coords)
-        if n > 1:
-            print(f"  [coords] '{names_map[key]}' has {n} points → centroid used")
-        result[key] = {
-            "lat":           round(sum(lats) / n, 6),
-            "lon":           round(sum(lons) / n, 6),
-            "original_name": names_map[key],
-            "district":      district,
-            "num_points":    n,
-        }
-
-    return result
+    df = pd.read_json(path, dtype={"hobli_name": str})
+    if df.empty:
+        return {}
+    df["key"] = df["hobli_name"].map(norm_key)
+
+    # One vectorised groupby pass instead of per-row dict/tuple accumulation
+    grouped = df.groupby("key", sort=False).agg(
+        lat=("latitude", "mean"),
+        lon=("longitude", "mean"),
+        original_name=("hobli_name", "last"),  # last write wins for display name
+        num_points=("hobli_name", "size"),
+    )
+    grouped[["lat", "lon"]] = grouped[["lat", "lon"]].round(6)
+    grouped["district"] = district
+
+    for name, n in grouped.loc[grouped["num_points"] > 1, ["original_name", "num_points"]].itertuples(index=False):
+        print(f"  [coords] '{name}' has {n} points → centroid used")
+
+    grouped = grouped[["lat", "lon", "original_name", "district", "num_points"]]
+    return grouped.to_dict(orient="index")
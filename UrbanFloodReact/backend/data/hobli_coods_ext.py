@@ -1,8 +1,9 @@
 import pandas as pd
-import shapely.wkb as wkb
+import numpy as np
+import geopandas as gpd
+import shapely
 from pyproj import Transformer
-import ast
-import json
+import codecs
 
 # ---------- CONFIG ----------
 INPUT_FILE = "rural_hobli.csv"
@@ -11,47 +12,55 @@ SOURCE_CRS = "EPSG:32643"   # UTM Zone 43N (Bengaluru)
 TARGET_CRS = "EPSG:4326"    # WGS84 (Lat/Lon)
 # ----------------------------
 
-def extract_hobli_coordinates(input_file, output_file):
-    # Load dataset
-    df = pd.read_csv(input_file)
-
-    # Coordinate transformer
-    transformer = Transformer.from_crs(
-        SOURCE_CRS,
-        TARGET_CRS,
-        always_xy=True
-    )
+# Built once per process; PROJ pipeline setup dominates a single small batch
+_TRANSFORMER = Transformer.from_crs(SOURCE_CRS, TARGET_CRS, always_xy=True)
 
-    hobli_data = []
+def _decode_wkb(raw):
+    """
+    Turn one stringified geometry cell into WKB bytes (None on error).
+    Cells are usually Python bytes reprs ("b'\\x01...'"), undone with
+    escape_decode instead of a full ast.literal_eval; plain hex WKB (as in
+    PostGIS dumps) is also accepted.
+    """
+    try:
+        if raw.startswith(("b'", 'b"')):
+            return codecs.escape_decode(raw[2:-1])[0]
+        return bytes.fromhex(raw)
+    except Exception as e:
+        print(f"Skipping row due to error: {e}")
+        return None
 
-    for _, row in df.iterrows():
-        try:
-            # Convert string representation of bytes to actual bytes
-            geom_bytes = ast.literal_eval(row["geometry"])
 
-            # Load WKB geometry
-            geom = wkb.loads(geom_bytes)
+def extract_hobli_coordinates(input_file, output_file):
+    # Load dataset
+    df = pd.read_csv(input_file)
 
-            # Get centroid of polygon
-            centroid = geom.centroid
-            x, y = centroid.x, centroid.y
+    # Decode the blobs, then parse them all in one vectorised GEOS call
+    blobs = df["geometry"].map(_decode_wkb)
+    geoms = pd.Series(shapely.from_wkb(blobs.to_numpy(), on_invalid="ignore"), index=df.index)
+    invalid = blobs.notna() & geoms.isna()
+    if invalid.any():
+        print(f"Skipping {invalid.sum()} rows with invalid WKB")
+    valid = geoms.notna()
+    df, geoms = df[valid], geoms[valid]
 
-            # Convert to lat/lon
-            lon, lat = transformer.transform(x, y)
+    # Centroids for the whole column in one vectorised GEOS call
+    cent = gpd.GeoSeries(geoms, crs=SOURCE_CRS).centroid
 
-            hobli_data.append({
-                "hobli_name": row["KGISHobliN"],
-                "latitude": round(lat, 6),
-                "longitude": round(lon, 6)
-            })
+    # Single batched reprojection, written in place over our own coordinate arrays
+    lon = cent.x.to_numpy(dtype=float, copy=True)
+    lat = cent.y.to_numpy(dtype=float, copy=True)
+    _TRANSFORMER.transform(lon, lat, inplace=True)
 
-        except Exception as e:
-            print(f"Skipping row due to error: {e}")
-            continue
+    hobli_data = pd.DataFrame({
+        "hobli_name": df["KGISHobliN"].to_numpy(),
+        "latitude": np.round(lat, 6),
+        "longitude": np.round(lon, 6),
+    })
 
-    # Write to JSON file
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(hobli_data, f, indent=4)
+    # Write to JSON file with pandas' C (ujson) writer; json.dump streams
+    # through the pure-Python encoder
+    hobli_data.to_json(output_file, orient="records", indent=4, double_precision=6)
 
     print(f"\n✅ Successfully exported {len(hobli_data)} hoblis to {output_file}")
 
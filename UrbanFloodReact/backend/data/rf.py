@@ -1,9 +1,14 @@
 import requests
 import pdfplumber
+import pypdfium2 as pdfium
 import pandas as pd
+import re
 from io import BytesIO
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import os
+import numpy as np
+from pathlib import Path
 
 # --- CONFIGURATION ---
 BASE_URL = "https://www.ksndmc.org/en/Root/DownloadFile"
@@ -13,8 +18,20 @@ FILENAME_TEMPLATE = "Rainfall Pattern_{date}.pdf"
 # Set your date range here
 START_DATE = datetime(2025, 7, 1)
 END_DATE = datetime(2025, 7, 31)
-RAW_FILE = "Raw_Data_Dump.xlsx"
+RAW_DIR = "raw_data"  # one RF_<yyyymmdd>.parquet per day
 CLEAN_FILE = "Bengaluru_Rainfall_24Hrs_June.xlsx"
+MAX_DOWNLOAD_WORKERS = 8
+START_MARKER = "HOBLIWISE RAINFALL PATTERN"
+NUMERIC_COLS = ['24h_Normal_mm', '24h_Actual_mm', '24h_Dep_Pct']
+
+# Compiled once and reused for every sheet
+_BENG_RE = re.compile(r"BENGALURU\s+(?:URBAN|RURAL)")
+# Embedded newlines plus surrounding whitespace, stripped in a single substitution
+_CELL_JUNK_RE = re.compile(r"\n|^\s+|\s+$")
+
+# One keep-alive session shared by the download threads (amortises TLS handshakes)
+_session = requests.Session()
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_DOWNLOAD_WORKERS))
 
 def generate_dates(start, end):
     curr = start
@@ -26,7 +43,7 @@ def download_pdf(date_str):
     params = {"path": PATH_TEMPLATE.format(date=date_str), "fileName": FILENAME_TEMPLATE.format(date=date_str)}
     print(f"\n[DEBUG] Downloading: {date_str}")
     try:
-        response = requests.get(BASE_URL, params=params, timeout=30)
+        response = _session.get(BASE_URL, params=params, timeout=30)
         if response.status_code == 200 and len(response.content) > 5000:
             return BytesIO(response.content)
         return None
@@ -34,49 +51,107 @@ def download_pdf(date_str):
         print(f"[ERROR] Download failed: {e}")
         return None
 
+def find_start_page(pdf_bytes):
+    """
+    Index of the first page containing the hobli-wise section marker, or None.
+    Uses PDFium's C text layer, which is far cheaper than pdfplumber's
+    layout-reconstructing extract_text().
+    """
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        for i in range(len(pdf)):
+            text = pdf[i].get_textpage().get_text_range()
+            # Collapse line breaks / runs of spaces the way extract_text() would
+            if START_MARKER in " ".join(text.upper().replace("-", "").split()):
+                return i
+    finally:
+        pdf.close()
+    return None
+
 def extract_raw_rows(pdf_stream):
     rows = []
-    found_start = False
     try:
+        start_page = find_start_page(pdf_stream.getvalue())
+        if start_page is None:
+            return rows
         with pdfplumber.open(pdf_stream) as pdf:
-            for page in pdf.pages:
-                text = (page.extract_text() or "").upper().replace("-", "")
-                if "HOBLIWISE RAINFALL PATTERN" in text:
-                    found_start = True
-                if found_start:
-                    # Using lattice strategy to keep the column structure rigid
-                    table = page.extract_table({"vertical_strategy": "lines", "horizontal_strategy": "lines"})
-                    if table: rows.extend(table)
+            for page in pdf.pages[start_page:]:
+                # Using lattice strategy to keep the column structure rigid
+                table = page.extract_table({"vertical_strategy": "lines", "horizontal_strategy": "lines"})
+                if table:
+                    rows.extend(table)
+                elif rows:
+                    # First table-less page after the section: the hobli tables have ended
+                    break
     except Exception as e:
         print(f"[ERROR] PDF Parse error: {e}")
     return rows
 
-def clean_and_filter_data(raw_excel_path, output_path):
+def fetch_all_raw_rows(dates):
+    """
+    Download every day's PDF concurrently (I/O bound -> threads) and parse each
+    one as soon as it arrives (CPU bound -> processes).
+    Returns {date_str: raw_rows}.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS) as downloads, \
+         ProcessPoolExecutor(max_workers=os.cpu_count()) as parsers:
+        download_futs = {downloads.submit(download_pdf, d): d for d in dates}
+        parse_futs = {}
+        for fut in as_completed(download_futs):
+            pdf_stream = fut.result()
+            if pdf_stream:
+                parse_futs[parsers.submit(extract_raw_rows, pdf_stream)] = download_futs[fut]
+        for fut in as_completed(parse_futs):
+            results[parse_futs[fut]] = fut.result()
+    return results
+
+def write_raw_rows(raw_rows, date_str, raw_dir):
+    """Dump one day's raw table rows as Parquet (columns are stringified positions)."""
+    df = pd.DataFrame(raw_rows)
+    df.columns = df.columns.astype(str)  # Parquet requires string column names
+    df.to_parquet(raw_path(date_str, raw_dir), compression="zstd", index=False)
+
+def raw_path(date_str, raw_dir):
+    return Path(raw_dir) / f"RF_{date_str.replace('-','')}.parquet"
+
+def load_raw_sheets(raw_dir, dates=None):
+    """
+    Read the per-day Parquet dumps back as {sheet_name: positional DataFrame}.
+    With `dates`, only those days are read, so dumps left in raw_dir by an
+    earlier run over a different range are not merged in.
+    """
+    sheets = {}
+    if dates is None:
+        paths = sorted(Path(raw_dir).glob("RF_*.parquet"))
+    else:
+        paths = [p for p in (raw_path(d, raw_dir) for d in dates) if p.exists()]
+    for path in paths:
+        df = pd.read_parquet(path)
+        df.columns = range(df.shape[1])
+        # Blank cells came back as NaN from the old Excel dump; keep that so ffill sees them
+        sheets[path.stem] = df.replace("", np.nan)
+    return sheets
+
+def clean_and_filter_data(raw_dir, output_path, dates=None):
     print(f"\n[DEBUG] Starting Clean-up Process...")
     all_dates_data = []
     
-    # Load all sheets
-    raw_data_dict = pd.read_excel(raw_excel_path, sheet_name=None, header=None)
+    # Load this run's sheets (every dump in raw_dir when dates is None)
+    raw_data_dict = load_raw_sheets(raw_dir, dates)
     
     for sheet_name, df in raw_data_dict.items():
         # Find the header row by searching for 'DISTRICT' and 'HOBLI'
-        header_idx = None
-        for i, row in df.iterrows():
-            row_str = " ".join(map(str, row.values)).upper()
-            if "DISTRICT" in row_str and "HOBLI" in row_str:
-                header_idx = i
-                break
-        
-        if header_idx is None:
+        row_text = df.map(str).agg(" ".join, axis=1).str.upper()
+        is_header = row_text.str.contains("DISTRICT", regex=False) & row_text.str.contains("HOBLI", regex=False)
+        if not is_header.any():
             continue
+        header_idx = is_header.idxmax()
 
         # Slice from the data rows (usually 2-3 rows below the header title due to nested headers)
         # We look for the first row that starts with a number (Sl.No)
-        data_start_idx = header_idx
-        for i in range(header_idx, len(df)):
-            if str(df.iloc[i, 0]).strip().isdigit():
-                data_start_idx = i
-                break
+        is_data = df.iloc[header_idx:, 0].map(str).str.strip().str.isdigit()
+        data_start_idx = is_data.idxmax() if is_data.any() else header_idx
 
         df_clean = df.iloc[data_start_idx:].reset_index(drop=True)
         
@@ -85,7 +160,7 @@ def clean_and_filter_data(raw_excel_path, output_path):
         
         # 2. Filter for Bengaluru
         df_clean[1] = df_clean[1].astype(str).str.upper().str.strip()
-        mask = df_clean[1].str.contains("BENGALURU URBAN|BENGALURU RURAL", na=False)
+        mask = df_clean[1].str.contains(_BENG_RE, na=False)
         filtered_df = df_clean[mask].copy()
         
         if not filtered_df.empty:
@@ -93,11 +168,10 @@ def clean_and_filter_data(raw_excel_path, output_path):
             # Col 1: District, Col 2: Taluk, Col 3: Hobli
             # Col 7: 24h Normal, Col 8: 24h Actual, Col 9: 24h %Dep
             final_cols = filtered_df.iloc[:, [1, 2, 3, 7, 8, 9]].copy()
-            final_cols.columns = ['District', 'Taluk', 'Hobli', '24h_Normal_mm', '24h_Actual_mm', '24h_Dep_Pct']
+            final_cols.columns = ['District', 'Taluk', 'Hobli'] + NUMERIC_COLS
             
             # Clean numeric values (remove newlines or extra dots common in OCR/PDFs)
-            for col in ['24h_Normal_mm', '24h_Actual_mm', '24h_Dep_Pct']:
-                final_cols[col] = final_cols[col].astype(str).str.replace(r'\n', '', regex=True).str.strip()
+            final_cols[NUMERIC_COLS] = final_cols[NUMERIC_COLS].astype(str).replace(_CELL_JUNK_RE, "", regex=True)
 
             # Add Date
             date_val = sheet_name.replace("RF_", "")
@@ -113,12 +187,16 @@ def clean_and_filter_data(raw_excel_path, output_path):
         print("\n[WARNING] No Bengaluru data found. Check if the column indices (7, 8, 9) shifted.")
 
 # --- EXECUTION ---
-with pd.ExcelWriter(RAW_FILE, engine='openpyxl') as writer:
-    for date_str in generate_dates(START_DATE, END_DATE):
-        pdf_stream = download_pdf(date_str)
-        if pdf_stream:
-            raw_rows = extract_raw_rows(pdf_stream)
-            if raw_rows:
-                pd.DataFrame(raw_rows).to_excel(writer, sheet_name=f"RF_{date_str.replace('-','')}", index=False, header=False)
-
-clean_and_filter_data(RAW_FILE, CLEAN_FILE)
+if __name__ == "__main__":
+    dates = list(generate_dates(START_DATE, END_DATE))
+    raw_by_date = fetch_all_raw_rows(dates)
+
+    # Per-day raw dumps are written from the main thread in date order
+    os.makedirs(RAW_DIR, exist_ok=True)
+    for date_str in dates:
+        raw_rows = raw_by_date.get(date_str)
+        if raw_rows:
+            write_raw_rows(raw_rows, date_str, RAW_DIR)
+
+    # The cleaned table stays Excel: it is the human-readable artifact rainfall_loader reads
+    clean_and_filter_data(RAW_DIR, CLEAN_FILE, dates)
@@ -1,12 +1,48 @@
 import numpy as np
 import geopandas as gpd
-import random
 from shapely.geometry import Point, LineString, Polygon, MultiPolygon
-from shapely.ops import unary_union
 import matplotlib.cm as cm
 from matplotlib.colors import to_hex
 import osmnx as ox
 import networkx as nx
+from contourpy import contour_generator, FillType
+
+# Cap on flood raster size; the cell grows beyond ~8 m on very large extents
+FLOOD_RASTER_MAX_CELLS = 4_000_000
+
+
+def _splat_disks(field, origin, cell, xy, radius):
+    """
+    Raise `field` (a grid with lower-left cell centre `origin`, spacing `cell`)
+    to max(field, radius - distance to centre) over the disks (xy, radius),
+    so the union of all disks splatted so far is exactly field >= 0. Only
+    the cells within each disk's bounding window are touched; disks are
+    processed in groups of equal window size.
+    """
+    k = np.ceil(radius / cell).astype(np.int64) + 2
+    cx = np.rint((xy[:, 0] - origin[0]) / cell).astype(np.int64)
+    cy = np.rint((xy[:, 1] - origin[1]) / cell).astype(np.int64)
+    for kk in np.unique(k):
+        sel = np.flatnonzero(k == kk)
+        ox_, oy_ = np.meshgrid(np.arange(-kk, kk + 1), np.arange(-kk, kk + 1))
+        ix = cx[sel, None] + ox_.ravel()
+        iy = cy[sel, None] + oy_.ravel()
+        dist = np.hypot(origin[0] + ix * cell - xy[sel, 0, None],
+                        origin[1] + iy * cell - xy[sel, 1, None])
+        np.maximum.at(field, (iy.ravel(), ix.ravel()), (radius[sel, None] - dist).ravel())
+
+
+def _field_polygons(field, origin, cell):
+    """MultiPolygon of the region field >= 0 (filled contour, holes kept)."""
+    ny, nx_ = field.shape
+    gen = contour_generator(origin[0] + np.arange(nx_) * cell, origin[1] + np.arange(ny) * cell,
+                            field, fill_type=FillType.OuterOffset)
+    polys = []
+    for points, offsets in zip(*gen.filled(0.0, np.inf)):
+        rings = [points[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+        polys.append(Polygon(rings[0], rings[1:]))
+    return MultiPolygon(polys)
+
 
 class UrbanFloodSimulator:
     """
@@ -31,6 +67,15 @@ class UrbanFloodSimulator:
         self.shelter_occupancy = {} # shelter_id -> person_count
         self.total_evacuated = 0
 
+        # Dense per-node / per-edge arrays for the flood physics, built on
+        # first use (see _build_arrays). _depth mirrors the 'water_depth'
+        # node attributes; None means "re-read them from the graph".
+        self._nodes = None
+        self._depth = None
+        self._xy = None
+        self._edge_geoms = None
+        self._pop = None
+
     def initialize_flood(self, rainfall_mm):
         """
         Apply uniform rainfall to all nodes. 
@@ -38,6 +83,7 @@ class UrbanFloodSimulator:
         """
         rainfall_m = rainfall_mm / 1000.0
         nx.set_node_attributes(self.G, rainfall_m, 'water_depth')
+        self._depth = None
         return self.G
 
     def initialize_from_drains(self, rainfall_mm):
@@ -70,76 +116,143 @@ class UrbanFloodSimulator:
              # Only if node exists in graph (should be checked by nearest_nodes but safety first)
              if self.G.has_node(node):
                 self.G.nodes[node]['water_depth'] = lake_head
-            
+
+        self._depth = None
         return self.G
 
+    def _build_arrays(self):
+        """
+        Index the (fixed) graph once for the vectorised physics:
+          _nodes / _node_index : node order used by every array
+          _node_attrs          : each node's attribute dict, in that order
+          _elev                : elevation per node (0.0 where missing)
+          _src, _dst           : one entry per neighbour link (G.neighbors
+                                 semantics: successors, no self-loops)
+          _indptr              : CSR row pointers, node i's links are
+                                 _src/_dst[_indptr[i]:_indptr[i + 1]]
+        """
+        self._nodes = list(self.G.nodes())
+        self._node_index = {n: i for i, n in enumerate(self._nodes)}
+        self._node_attrs = [d for _, d in self.G.nodes(data=True)]
+        self._elev = np.array([d.get('elevation', 0.0) for _, d in self.G.nodes(data=True)],
+                              dtype=np.float64)
+
+        # Adjacency rows are exactly G.neighbors(): successors, parallel
+        # edges listed once (and both directions on undirected graphs)
+        index = self._node_index
+        src, dst = [], []
+        for i, (u, nbrs) in enumerate(self.G.adj.items()):
+            for v in nbrs:
+                if v != u:
+                    src.append(i)
+                    dst.append(index[v])
+        self._src = np.array(src, dtype=np.int64)
+        self._dst = np.array(dst, dtype=np.int64)
+        self._indptr = np.zeros(len(self._nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self._src, minlength=len(self._nodes)), out=self._indptr[1:])
+
+    @property
+    def node_index(self):
+        """node → position in G.nodes() order; planners built on this graph reuse it."""
+        if self._nodes is None:
+            self._build_arrays()
+        return self._node_index
+
+    def _read_depths(self):
+        """(depth array, has-attribute mask) from the 'water_depth' node attributes."""
+        depths = nx.get_node_attributes(self.G, 'water_depth')
+        has = np.fromiter((n in depths for n in self._nodes), dtype=bool, count=len(self._nodes))
+        depth = np.fromiter((depths.get(n, 0.0) for n in self._nodes), dtype=np.float64,
+                            count=len(self._nodes))
+        return depth, has
+
+    def _current_depths(self):
+        """(depth, has-attribute mask) as of the last step, read from the graph if stale."""
+        if self._nodes is None:
+            self._build_arrays()
+        if self._depth is None:
+            self._depth, self._has_depth = self._read_depths()
+        return self._depth, self._has_depth
+
+    def _node_xy(self):
+        """(n_nodes, 2) array of node x/y coordinates in _nodes order (cached)."""
+        if self._xy is None:
+            self._xy = np.array([(d['x'], d['y']) for d in self._node_attrs], dtype=np.float64)
+        return self._xy
+
+    def _edge_geometry(self):
+        """
+        (edge_u, edge_v, geoms) for every edge in G.edges order, built once:
+        end-node indices into _nodes and each edge's geometry (its OSM
+        'geometry' or a straight LineString between the end nodes).
+        """
+        if self._edge_geoms is None:
+            index = self._node_index
+            xy = self._node_xy()
+            u_idx, v_idx, geoms = [], [], []
+            for u, v, data in self.G.edges(data=True):
+                i, j = index[u], index[v]
+                u_idx.append(i)
+                v_idx.append(j)
+                geoms.append(data['geometry'] if 'geometry' in data
+                             else LineString([xy[i], xy[j]]))
+            self._edge_u = np.array(u_idx, dtype=np.int64)
+            self._edge_v = np.array(v_idx, dtype=np.int64)
+            self._edge_geoms = np.empty(len(geoms), dtype=object)
+            self._edge_geoms[:] = geoms
+        return self._edge_u, self._edge_v, self._edge_geoms
+
     def propagate_flood_step(self, decay_factor=0.5):
         """
         Propagate water based on Hydraulic Head (Elevation + Water Depth).
         Water flows from High Head to Low Head.
+        Every node is updated from the same pre-step depths, as whole-array
+        operations over the neighbour links; results are written back to the
+        'water_depth' node attributes.
         """
-        current_depths = nx.get_node_attributes(self.G, 'water_depth')
-        elevations = nx.get_node_attributes(self.G, 'elevation')
-        
-        # Ensure elevation data exists
-        if not elevations:
-             elevations = {n: 0.0 for n in self.G.nodes()}
-        for n in self.G.nodes():
-            if n not in elevations: elevations[n] = 0.0
+        depth, has = self._current_depths()
+        n = len(self._nodes)
 
-        new_depths = current_depths.copy()
+        # Hydraulic head; nodes without a depth attribute count as dry
+        head = self._elev + depth
 
-        # For every node with water
-        for node in self.G.nodes():
-            if node not in current_depths: continue
-            
-            water_depth = current_depths[node]
-            if water_depth <= 0.001: continue 
+        # Only links leaving a wet node (> 1 mm) can carry water: gather
+        # just those CSR rows instead of scanning every link in the graph
+        wet = np.flatnonzero(has & (depth > 0.001))
+        starts = self._indptr[wet]
+        counts = self._indptr[wet + 1] - starts
+        links = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        src, dst = self._src[links], self._dst[links]
 
-            node_head = elevations[node] + water_depth
-            
-            neighbors = list(self.G.neighbors(node))
-            lower_head_neighbors = []
-            total_head_diff = 0
-
-            # Find neighbors with LOWER TOTAL HEAD
-            for n in neighbors:
-                n_elev = elevations.get(n, 0.0)
-                n_water = current_depths.get(n, 0.0)
-                n_head = n_elev + n_water
-                
-                if n_head < node_head:
-                    # Drive flow by head difference
-                    head_diff = node_head - n_head
-                    lower_head_neighbors.append((n, head_diff))
-                    total_head_diff += head_diff
-
-            if not lower_head_neighbors:
-                continue
-
-            # Distribute water
-            # Flow amount depends on how much water is available 'above' the neighbor's head?
-            # Simplified: Move a fraction of the water depth
-            flow_out = water_depth * decay_factor
-
-            for n, diff in lower_head_neighbors:
-                fraction = diff / total_head_diff
-                amount = flow_out * fraction
-                
-                # Check safeguards: Don't drain below neighbor's head (basic equalization)
-                # But for simple viz, just moving mass is fine.
-                
-                if node in new_depths:
-                    new_depths[node] -= amount
-                if n in new_depths:
-                    new_depths[n] += amount
-        
-        # Continuous visual rain on drains? 
+        # ... to a neighbour with LOWER TOTAL HEAD (np.compress: ~4x faster
+        # than boolean-mask indexing on these roughly half-set masks)
+        head_diff = head[src] - head[dst]
+        lower = head_diff > 0
+        src, dst, head_diff = (np.compress(lower, a) for a in (src, dst, head_diff))
+
+        # Distribute water
+        # Simplified: Move a fraction of the water depth, split across the
+        # lower neighbours in proportion to the head difference
+        total_head_diff = np.bincount(src, weights=head_diff, minlength=n)
+        amount = depth[src] * decay_factor * head_diff / total_head_diff[src]
+
+        # Only nodes that carry a depth attribute receive water
+        receives = has[dst]
+        new_depth = (depth - np.bincount(src, weights=amount, minlength=n)
+                     + np.bincount(np.compress(receives, dst), weights=np.compress(receives, amount),
+                                   minlength=n))
+
+        # Continuous visual rain on drains?
         # Optional: Add small increment to drains to simulate continuous overflow
         # for d in self.drain_nodes:
-        #     new_depths[d] += 0.01 
+        #     new_depth[self._node_index[d]] += 0.01
 
-        nx.set_node_attributes(self.G, new_depths, 'water_depth')
+        # Write back only the depths that moved (most of the graph stays dry)
+        changed = np.flatnonzero(has & (new_depth != depth))
+        attrs = self._node_attrs
+        for i, d in zip(changed.tolist(), new_depth[changed].tolist()):
+            attrs[i]['water_depth'] = d
+        self._depth = new_depth
         return self.G
 
     def distribute_population(self, total_pop):
@@ -148,124 +261,106 @@ class UrbanFloodSimulator:
         For simplicity, we distribute evenly across all nodes, but this could be
         weighted by degree or land use.
         """
-        nodes = list(self.G.nodes())
-        if not nodes: return
-        
-        per_node = total_pop // len(nodes)
-        rem = total_pop % len(nodes)
-        
-        self.node_populations = {n: per_node for n in nodes}
-        # Distribute remainder
-        for i in range(rem):
-            self.node_populations[nodes[i]] += 1
-            
-        print(f"  [flood_sim] Distributed {total_pop} people across {len(nodes)} nodes")
+        if self._nodes is None:
+            self._build_arrays()
+        n_nodes = len(self._nodes)
+        if not n_nodes: return
+
+        # Even split, remainder one each to the first nodes; kept as an array
+        # in _nodes order for get_at_risk_nodes, and as the node_populations dict
+        pop = np.full(n_nodes, total_pop // n_nodes, dtype=np.int64)
+        pop[:total_pop % n_nodes] += 1
+        self._pop = pop
+        self.node_populations = dict(zip(self._nodes, pop.tolist()))
+
+        print(f"  [flood_sim] Distributed {total_pop} people across {n_nodes} nodes")
 
     def get_at_risk_nodes(self, depth_threshold_m=0.15):
         """
         Identify nodes where water depth > threshold and there are people present.
         Returns a list of (node_id, population)
         """
-        node_depths = nx.get_node_attributes(self.G, 'water_depth')
-        at_risk = []
-        for n, depth in node_depths.items():
-            pop = self.node_populations.get(n, 0)
-            if depth > depth_threshold_m and pop > 0:
-                at_risk.append((n, pop))
-        return at_risk
+        depth, has = self._current_depths()
+        if self._pop is None:
+            return []
+        at_risk = np.flatnonzero(has & (depth > depth_threshold_m) & (self._pop > 0))
+        nodes = self._nodes
+        return [(nodes[i], p) for i, p in zip(at_risk.tolist(), self._pop[at_risk].tolist())]
 
     def calculate_flood_impact(self):
         """
         Calculate flood impact. Returns 3 tiered MultiPolygons for Low, Medium, High depth.
         This allows cleaner "polygon" visualization than thousands of circles.
         """
-        node_depths = nx.get_node_attributes(self.G, 'water_depth')
-        
-        # Buckets for levels
-        level1_geoms = [] # Shallow (0.05m - 0.5m)
-        level2_geoms = [] # Moderate (0.5m - 1.5m)
-        level3_geoms = [] # Deep (> 1.5m)
-        
+        depth, has = self._current_depths()
+
         # Base buffer size (larger for unioning) approx 30m
-        base_buffer = 0.0003 
-        
-        for n, depth in node_depths.items():
-            if depth < 0.05: continue
-            
-            pt = Point(self.G.nodes[n]['x'], self.G.nodes[n]['y'])
-            poly = pt.buffer(base_buffer + (depth * 0.00005)) # slightly larger for deep nodes
-            
-            if depth > 1.5:
-                level3_geoms.append(poly)
-                level2_geoms.append(poly) # Layering approach: Deep also exists in Med/Shallow layers?
-                level1_geoms.append(poly) # No, let's keep them separate or stacked. 
-                # Stacked is safer for coverage.
-            elif depth > 0.5:
-                level2_geoms.append(poly)
-                level1_geoms.append(poly)
-            else:
-                level1_geoms.append(poly)
-                
-        features = []
-        
-        # Union and create features
-        # Level 1 (Base Shallow Layer)
-        if level1_geoms:
-            l1_poly = unary_union(level1_geoms)
-            if l1_poly.geom_type == 'Polygon': l1_poly = MultiPolygon([l1_poly])
-            features.append({'geometry': l1_poly, 'intensity': 0.2})
-            
-        # Level 2 (Mid Layer)
-        if level2_geoms:
-            l2_poly = unary_union(level2_geoms)
-            if l2_poly.geom_type == 'Polygon': l2_poly = MultiPolygon([l2_poly])
-            features.append({'geometry': l2_poly, 'intensity': 0.6})
-            
-        # Level 3 (Deep Layer - Top)
-        if level3_geoms:
-            l3_poly = unary_union(level3_geoms)
-            if l3_poly.geom_type == 'Polygon': l3_poly = MultiPolygon([l3_poly])
-            features.append({'geometry': l3_poly, 'intensity': 1.0})
-            
+        base_buffer = 0.0003
+
+        # Every node with >= 5cm of water is a disk, slightly larger for deep
+        # nodes. Instead of buffering and unioning thousands of overlapping
+        # circles, each layer is the zero contour of a raster of
+        # max(radius - distance) over its disks (cells ~8 m, a quarter of the
+        # base radius; traced with linear interpolation, so the outline stays
+        # within ~1% of the exact circle union in area)
+        flooded = np.flatnonzero(has & (depth >= 0.05))
+        flooded_depth = depth[flooded]
+        xy = self._node_xy()[flooded]
+        radius = base_buffer + flooded_depth * 0.00005
+
+        if len(flooded):
+            # Cell size from the padded extent, then the pad in whole cells:
+            # _splat_disks reaches ceil(radius / cell) + 2 cells from each
+            # centre, which on capped (coarse) rasters can exceed any fixed pad
+            span = xy.max(axis=0) - xy.min(axis=0) + 2 * (radius.max() + 3 * base_buffer)
+            cell = max(base_buffer / 4, np.sqrt(span[0] * span[1] / FLOOD_RASTER_MAX_CELLS))
+            # A disk narrower than a capped cell could miss every cell centre
+            # and vanish; keep it at least 3/4 cell (past the half diagonal)
+            radius = np.maximum(radius, 0.75 * cell)
+            pad = (np.ceil(radius.max() / cell) + 3) * cell
+            origin = xy.min(axis=0) - pad
+            extent = xy.max(axis=0) + pad - origin
+            nx_, ny = (np.ceil(extent / cell).astype(np.int64) + 1).tolist()
+            field = np.full((ny, nx_), -pad)
+
+        # Levels are stacked (Deep also exists in Med/Shallow layers) for
+        # coverage: each band's disks are added to the same raster, which is
+        # contoured once per layer
+        #   Level 3 — Deep (> 1.5m), Level 2 — Moderate (0.5m - 1.5m),
+        #   Level 1 — Shallow (0.05m - 0.5m)
+        layers = []
+        for band, intensity in ((flooded_depth > 1.5, 1.0),
+                                ((flooded_depth > 0.5) & (flooded_depth <= 1.5), 0.6),
+                                (flooded_depth <= 0.5, 0.2)):
+            if band.any():
+                _splat_disks(field, origin, cell, xy[band], radius[band])
+            if layers or band.any():
+                layers.append({'geometry': _field_polygons(field, origin, cell),
+                               'intensity': intensity})
+
+        # Base shallow layer first, deep layer on top
+        features = layers[::-1]
+
         if not features:
             flood_gdf = gpd.GeoDataFrame(columns=['geometry', 'intensity'], crs=self.G.graph['crs'])
         else:
             flood_gdf = gpd.GeoDataFrame(features, crs=self.G.graph['crs'])
 
         # --- Flooded roads layer (absolute depth thresholds) ---
-        road_geoms, road_risks, road_depths = [], [], []
-
-        for u, v, k, data in self.G.edges(keys=True, data=True):
-            u_depth = node_depths.get(u, 0.0)
-            v_depth = node_depths.get(v, 0.0)
-            avg_depth_m = (u_depth + v_depth) / 2.0
-            avg_depth_cm = avg_depth_m * 100.0
-
-            if avg_depth_cm > 5.0:  # Only show roads with > 5cm water
-                if 'geometry' in data:
-                    geom = data['geometry']
-                else:
-                    geom = LineString([
-                        (self.G.nodes[u]['x'], self.G.nodes[u]['y']),
-                        (self.G.nodes[v]['x'], self.G.nodes[v]['y'])
-                    ])
-
-                road_geoms.append(geom)
-                road_depths.append(round(avg_depth_cm, 1))
-
-                # Absolute thresholds — not relative — so colors spread meaningfully
-                if avg_depth_cm < 20.0:
-                    road_risks.append('low')     # green  — passable
-                elif avg_depth_cm < 50.0:
-                    road_risks.append('medium')  # yellow — caution
-                else:
-                    road_risks.append('high')    # red    — dangerous
-
-        if road_geoms:
+        # Mean depth of both end nodes for every edge at once
+        edge_u, edge_v, edge_geoms = self._edge_geometry()
+        avg_depth_cm = (depth[edge_u] + depth[edge_v]) / 2.0 * 100.0
+        wet_roads = avg_depth_cm > 5.0  # Only show roads with > 5cm water
+        road_depth_cm = avg_depth_cm[wet_roads]
+
+        if wet_roads.any():
             roads_gdf = gpd.GeoDataFrame({
-                'geometry': road_geoms,
-                'risk': road_risks,
-                'depth_cm': road_depths
+                'geometry': edge_geoms[wet_roads],
+                # Absolute thresholds — not relative — so colors spread meaningfully:
+                # green — passable, yellow — caution, red — dangerous
+                'risk': np.select([road_depth_cm < 20.0, road_depth_cm < 50.0],
+                                  ['low', 'medium'], default='high'),
+                'depth_cm': road_depth_cm.round(1)
             }, crs=self.G.graph['crs'])
         else:
             roads_gdf = gpd.GeoDataFrame(
@@ -21,7 +21,9 @@ Public API:
 """
 
 from pathlib import Path
+from functools import lru_cache
 import re
+import numpy as np
 import pandas as pd
 from collections import defaultdict
 
@@ -97,17 +99,17 @@ def load_population(csv_path: Path, regions_tree: dict, norm_key_fn) -> None:
         return
 
     # Pre-build normalised ward lookup: norm_ward_name → row dict
-    ward_rows = []
-    for _, row in df.iterrows():
-        ward_name = str(row[col_ward]).strip()
-        ward_rows.append({
-            "name":   ward_name,
-            "norm":   _norm_name(ward_name),
-            "total":  _safe_int(row.get(col_pop, 0)),
-            "male":   _safe_int(row.get(col_male, 0)) if col_male else 0,
-            "female": _safe_int(row.get(col_fem,  0)) if col_fem  else 0,
-            "cons":   str(row.get(col_cons, "")).strip() if col_cons else "",
-        })
+    # (column-wise, then one to_dict instead of a Python row object per ward)
+    zeros = pd.Series(0, index=df.index)
+    names = df[col_ward].astype(str).str.strip()
+    ward_rows = pd.DataFrame({
+        "name":   names,
+        "norm":   names.map(_norm_name),
+        "total":  _safe_int_column(df[col_pop]),
+        "male":   _safe_int_column(df[col_male]) if col_male else zeros,
+        "female": _safe_int_column(df[col_fem])  if col_fem  else zeros,
+        "cons":   df[col_cons].astype(str).str.strip() if col_cons else "",
+    }).to_dict("records")
 
     # Collect all hobli display names from the tree
     all_hoblis: list[tuple[str, str, str]] = []   # (display, norm_key, taluk)
@@ -120,9 +122,10 @@ def load_population(csv_path: Path, regions_tree: dict, norm_key_fn) -> None:
     matched_directly = 0
     unmatched_hoblis = []
 
+    ward_index = _build_ward_index(ward_rows)
     for (display, key, taluk) in all_hoblis:
         hobli_norm = _norm_name(display)
-        best = _find_best_ward_match(hobli_norm, ward_rows)
+        best = _find_best_ward_match(hobli_norm, ward_index)
         if best:
             POPULATION_STORE[key] = {
                 "total":         best["total"],
@@ -192,33 +195,58 @@ def get_population(hobli_key: str) -> dict | None:
 
 # ── Helpers ─────────────────────────────────────────────────────────────────────
 
+_RE_PUNCT = re.compile(r"[^a-z0-9\s]")
+_RE_WS    = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
 def _norm_name(name: str) -> str:
     """Lowercase, remove punctuation, collapse spaces for fuzzy comparison."""
     n = name.lower().strip()
-    n = re.sub(r"[^a-z0-9\s]", " ", n)   # drop punctuation
-    n = re.sub(r"\s+", " ", n).strip()
+    n = _RE_PUNCT.sub(" ", n)   # drop punctuation
+    n = _RE_WS.sub(" ", n).strip()
     return n
 
 
-def _find_best_ward_match(hobli_norm: str, ward_rows: list) -> dict | None:
+def _build_ward_index(ward_rows: list) -> tuple:
+    """
+    Hash indexes over the ward rows for _find_best_ward_match:
+    (ward_rows, exact norm → first ward, trigram → ward positions).
+    """
+    exact: dict[str, dict] = {}
+    trigrams: dict[str, list[int]] = defaultdict(list)
+    for pos, ward in enumerate(ward_rows):
+        wn = ward["norm"]
+        exact.setdefault(wn, ward)
+        for tri in {wn[i:i + 3] for i in range(len(wn) - 2)}:
+            trigrams[tri].append(pos)
+    return ward_rows, exact, trigrams
+
+
+def _find_best_ward_match(hobli_norm: str, ward_index: tuple) -> dict | None:
     """
     Return the best matching ward row for this hobli norm name, or None.
     Match rules (in priority):
       1. Exact normalised match
       2. Hobli norm is contained in ward norm (e.g. "marathahalli" in "marathahalli")
       3. Ward norm is contained in hobli norm
+    `ward_index` comes from _build_ward_index: rule 1 is a dict lookup, and
+    rules 2-3 only test wards sharing a trigram with the hobli name (any
+    containment of >= 5 chars implies one), in CSV order.
     """
-    for ward in ward_rows:
-        wn = ward["norm"]
-        if hobli_norm == wn:
-            return ward
-    for ward in ward_rows:
-        wn = ward["norm"]
+    ward_rows, exact, trigrams = ward_index
+    if hobli_norm in exact:
+        return exact[hobli_norm]
+    candidates = set()
+    for i in range(len(hobli_norm) - 2):
+        candidates.update(trigrams.get(hobli_norm[i:i + 3], ()))
+    for pos in sorted(candidates):
+        wn = ward_rows[pos]["norm"]
         if hobli_norm in wn or wn in hobli_norm:
             # Avoid very short accidental matches (minimum 5 chars)
             overlap = min(len(hobli_norm), len(wn))
             if overlap >= 5:
-                return ward
+                return ward_rows[pos]
     return None
 
 
@@ -234,6 +262,13 @@ def _find_taluk(cons_name: str) -> str | None:
     return None
 
 
+def _safe_int_column(col: pd.Series) -> pd.Series:
+    """_safe_int over a whole column: commas stripped, truncated, 0 on junk."""
+    num = pd.to_numeric(col.astype(str).str.replace(",", "").str.strip(), errors="coerce")
+    num = num.where(np.isfinite(num), 0)
+    return np.trunc(num).astype("int64")
+
+
 def _safe_int(val) -> int:
     try:
         return int(float(str(val).replace(",", "").strip()))
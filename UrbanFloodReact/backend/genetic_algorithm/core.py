@@ -27,7 +27,10 @@ class GeneticEvacuationPlanner(SetupMixin, EvolutionMixin, GeometryMixin):
 
     def __init__(self, at_risk_nodes, safe_shelters, G,
                  pop_size=60, generations=40, mutation_rate=0.15,
-                 use_tomtom_traffic=False, **kwargs):
+                 use_tomtom_traffic=False, num_islands=4,
+                 migration_interval=10, migration_rate=0.1, fitness_workers=0,
+                 island_workers=0, plateau_generations=0, seed=None, node_index=None,
+                 **kwargs):
         # **kwargs absorbs ACO/PSO-specific params (n_ants, n_particles, iterations)
         # when the algorithm factory passes a unified param set — safe to ignore.
         """
@@ -37,6 +40,20 @@ class GeneticEvacuationPlanner(SetupMixin, EvolutionMixin, GeometryMixin):
         G             : NetworkX road graph with 'length' edge attr and optional
                         'water_depth' node attr
         use_tomtom_traffic: bool - if True, fetches real-time traffic for major roads
+        num_islands   : sub-populations evolved separately (island model); 1 = panmictic
+        migration_interval / migration_rate : every `interval` generations each
+                        island's best `rate` fraction replaces the next island's worst
+        fitness_workers: >1 scores populations in a process pool (worth it only
+                        for very large pop_size × n_risk); 0 = in-process
+        island_workers: >1 evolves the islands in parallel in a process pool;
+                        0 = in-process (each island has its own spawned
+                        Generator either way, so seeded results match)
+        plateau_generations: stop once the best fitness has not improved for at
+                        least this many generations, checked at each migration
+                        checkpoint; 0 (default) = always run every generation
+        seed          : seed for the GA's NumPy Generator (None = fresh entropy)
+        node_index    : node → position in G.nodes() order (e.g. the flood
+                        simulator's), reused instead of re-indexing the graph
         """
         self.at_risk_nodes = at_risk_nodes
         self.safe_shelters = safe_shelters
@@ -45,6 +62,15 @@ class GeneticEvacuationPlanner(SetupMixin, EvolutionMixin, GeometryMixin):
         self.generations = generations
         self.mutation_rate = mutation_rate
         self.use_tomtom_traffic = use_tomtom_traffic
+        self.num_islands = num_islands
+        self.migration_interval = max(1, migration_interval)
+        self.migration_rate = migration_rate
+        self.fitness_workers = fitness_workers
+        self.island_workers = island_workers
+        self.plateau_generations = plateau_generations
+        self._node_index = node_index
+        # All GA randomness is drawn in bulk from one PCG64 generator
+        self._rng = np.random.default_rng(seed)
 
         n_risk = len(at_risk_nodes)
         n_shelters = len(safe_shelters)
@@ -55,11 +81,11 @@ class GeneticEvacuationPlanner(SetupMixin, EvolutionMixin, GeometryMixin):
         if self.use_tomtom_traffic:
             self._update_graph_with_tomtom_traffic()
 
+        # Flat NumPy columns of the node/shelter fields used in the hot paths
+        self._build_columns()
+
         # ── Step 1: build flood-aware edge weights ────────────────────────────
         self._add_flood_edge_weights()
-        self.pop_size = pop_size
-        self.generations = generations
-        self.mutation_rate = mutation_rate
 
         # ── Step 2: precompute cost matrices (network distance + travel time) ─
         self.dist_matrix = np.full((n_risk, n_shelters), np.inf)
@@ -69,6 +95,16 @@ class GeneticEvacuationPlanner(SetupMixin, EvolutionMixin, GeometryMixin):
         # ── Step 3: greedy nearest-shelter assignment (used to seed population) ─
         self._greedy_chromosome = self._compute_greedy_chromosome()
 
+        # Narrowest integer type that holds every shelter index: chromosomes
+        # are stored in it, cutting population memory 4-8x vs int32/int64
+        self._gene_dtype = self._shelter_index_dtype()
+
+        # 3 nearest shelters per node, sorted once for seeding + mutation
+        self._nearest3 = self._nearest_shelters(3).astype(self._gene_dtype)
+
+        # ── Step 4: dense cost arrays for the vectorised population fitness ──
+        self._prepare_fitness_arrays()
+
     def run(self):
         if not self.at_risk_nodes or not self.safe_shelters:
             self.best_fitness = 0.0
@@ -76,27 +112,43 @@ class GeneticEvacuationPlanner(SetupMixin, EvolutionMixin, GeometryMixin):
 
         population = self._init_population()
 
-        elite_n = max(1, self.pop_size // 10)  # top 10% preserved each gen
-
-        for gen in range(self.generations):
-            fitness_scores = np.array([self._fitness(c) for c in population])
-
-            # Elite preservation — carry best chromosomes unchanged
-            elite_idx = np.argsort(fitness_scores)[:elite_n]
-            elites = [population[i] for i in elite_idx]
-
-            new_pop = list(elites)
-            while len(new_pop) < self.pop_size:
-                p1 = self._selection(population, fitness_scores)
-                p2 = self._selection(population, fitness_scores)
-                c1, c2 = self._crossover(p1, p2)
-                new_pop.append(self._mutate(c1))
-                if len(new_pop) < self.pop_size:
-                    new_pop.append(self._mutate(c2))
-
-            population = new_pop
+        # Island model: sub-populations evolve independently and exchange their
+        # best chromosomes around a ring every migration_interval generations
+        n_islands = max(1, min(self.num_islands, self.pop_size // 2))
+        islands = np.array_split(population, n_islands)
+        scores = [None] * n_islands
+
+        self._open_island_pool(n_islands)
+        if self._island_pool is None:
+            self._open_fitness_pool()
+        # Whole-run plateau check at each migration checkpoint: stop once no
+        # island has improved the best fitness for plateau_generations generations
+        best, stale = np.inf, 0
+        try:
+            for start in range(0, self.generations, self.migration_interval):
+                epoch = min(self.migration_interval, self.generations - start)
+                evolved = self._evolve_islands(islands, scores, epoch)
+                islands = [pop for pop, _ in evolved]
+                scores = [fit for _, fit in evolved]
+
+                epoch_best = min(fit.min() for fit in scores)
+                if best - epoch_best > self.PLATEAU_TOL:
+                    best, stale = epoch_best, 0
+                else:
+                    stale += epoch
+                    if self.plateau_generations and stale >= self.plateau_generations:
+                        print(f"  [GA] Fitness plateaued — stopping after {start + epoch} generations")
+                        break
+                if n_islands > 1:
+                    islands, scores = self._migrate(islands, scores)
+
+            population = np.concatenate(islands)
+            fitness_scores = (np.concatenate(scores) if scores[0] is not None
+                              else self._fitness_batch(population))
+        finally:
+            self._close_island_pool()
+            self._close_fitness_pool()
 
-        fitness_scores = np.array([self._fitness(c) for c in population])
         best_idx = int(np.argmin(fitness_scores))
         self.best_fitness = float(fitness_scores[best_idx])
         best = population[best_idx]
@@ -1,102 +1,400 @@
-import random
-import math
 import numpy as np
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+
+
+def population_fitness(population, link_cost, pops, caps, capacity_penalty, layout=None):
+    """
+    Multi-factor fitness (lower = better) for every row of a
+    (pop_size, n_risk) population array:
+      - Weighted sum of flood-aware network distance per person
+      - Weighted sum of travel time per person
+      - Heavy capacity overflow penalty
+    Module-level so fitness worker processes can run it without the planner.
+    """
+    n_pop, n_risk = population.shape
+    n_shelters = len(caps)
+
+    # Distance is the primary factor, time adds secondary weight — both
+    # folded into link_cost, so one gather + row sum covers them
+    # (float32 gather halves memory traffic; accumulate in float64 for accuracy).
+    # Flat np.take on precomputed row starts: ~2x faster than 2D fancy indexing
+    flat_idx = population + np.arange(n_risk) * n_shelters
+    cost = np.take(link_cost.ravel(), flat_idx).sum(axis=1, dtype=np.float64)
+
+    # People per (chromosome, shelter) in a single bincount over offset ids
+    if layout is None:
+        layout = (np.arange(n_pop)[:, None] * n_shelters, np.tile(pops, n_pop))
+    row_offsets, weights = layout
+    counts = np.bincount((population + row_offsets).ravel(), weights=weights,
+                         minlength=n_pop * n_shelters).reshape(n_pop, n_shelters)
+
+    # Penalty is quadratic so that putting 1000 extra people in 1 shelter
+    # is mathematically *much* worse than putting 100 extra people in 10 shelters.
+    overflow = np.maximum(counts - caps, 0.0)
+    penalty = (overflow ** 2).sum(axis=1) * capacity_penalty
+
+    return cost + penalty
+
+
+def score_population(population, link_cost, pops, caps, capacity_penalty, layouts, block_genes):
+    """
+    population_fitness over row blocks of ~block_genes genes, so the gather /
+    bincount temporaries stay cache-sized on large populations. `layouts`
+    caches the bincount (row offsets, tiled weights) per block height.
+    """
+    block = max(1, block_genes // max(1, population.shape[1]))
+    scores = []
+    for start in range(0, len(population), block):
+        rows = population[start:start + block]
+        layout = layouts.get(len(rows))
+        if layout is None:
+            layout = (np.arange(len(rows))[:, None] * len(caps), np.tile(pops, len(rows)))
+            layouts[len(rows)] = layout
+        scores.append(population_fitness(rows, link_cost, pops, caps, capacity_penalty, layout))
+    return np.concatenate(scores) if scores else np.empty(0)
+
+
+# Shared-memory blocks a worker has attached to, kept open for its lifetime
+_worker_blocks = []
+
+def _attach_shared(name, shape, dtype):
+    """Read-only view of an array the parent placed in shared memory."""
+    shm = SharedMemory(name=name)
+    _worker_blocks.append(shm)
+    arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    arr.flags.writeable = False
+    return arr
+
+
+# Per-process copy of the fitness arrays, installed once by the pool initializer
+_worker_arrays = None
+
+def _init_fitness_worker(link_cost_ref, pops, caps, capacity_penalty, block_genes):
+    global _worker_arrays
+    link_cost = _attach_shared(*link_cost_ref)
+    # Each worker keeps its own bincount layout cache across chunks
+    _worker_arrays = (link_cost, pops, caps, capacity_penalty, {}, block_genes)
+
+def _fitness_chunk(chunk):
+    return score_population(chunk, *_worker_arrays)
+
+
+# Per-process island evolver, installed once by the island pool initializer
+_worker_island = None
+
+def _init_island_worker(link_cost_ref, pops, caps, capacity_penalty, block_genes,
+                        nearest3, mutation_rate):
+    global _worker_island
+    link_cost = _attach_shared(*link_cost_ref)
+    _worker_island = _IslandEvolver(link_cost, pops, caps, capacity_penalty, block_genes,
+                                    nearest3, mutation_rate)
+
+def _evolve_island(island, generations, fitness_scores, rng):
+    # The island's own Generator travels with it, so results do not depend
+    # on which worker picks the island up
+    _worker_island._rng = rng
+    population, fitness_scores = _worker_island._evolve(island, generations, fitness_scores)
+    return population, fitness_scores, rng
+
 
 class EvolutionMixin:
+    # Genes (rows × n_risk) scored per population_fitness call
+    FITNESS_BLOCK_GENES = 1 << 20
+    # Smallest drop in best fitness that counts as progress (plateau check)
+    PLATEAU_TOL = 1e-3
+
     def _init_population(self):
         """
         Seed 80% of population with variants of the greedy chromosome (small
         random perturbations), and 20% fully random.  This gives the GA a
         strong starting point while keeping diversity.
+        Returns one (pop_size, n_risk) array so fitness can be scored for the
+        whole population at once.
         """
         n_shelters = len(self.safe_shelters)
-        pop = []
+        n_risk = len(self.at_risk_nodes)
 
         greedy_count = int(self.pop_size * 0.8)
         random_count = self.pop_size - greedy_count
 
-        for _ in range(greedy_count):
-            # Perturb greedy solution: randomly reassign ~15% of nodes to their
-            # 2nd or 3rd nearest shelter so we don't all start from the same point
-            chrom = list(self._greedy_chromosome)
-            for i in range(len(chrom)):
-                if random.random() < 0.15:
-                    # Pick one of the 3 nearest shelters (weighted by distance)
-                    row = self.dist_matrix[i]
-                    nearest3 = np.argsort(row)[:3]
-                    chrom[i] = int(random.choice(nearest3))
-            pop.append(chrom)
-
-        for _ in range(random_count):
-            # Purely random — ensures exploration
-            pop.append([random.randint(0, n_shelters - 1)
-                        for _ in range(len(self.at_risk_nodes))])
-
-        return pop
+        # Perturb greedy solution: randomly reassign ~15% of nodes to their
+        # 2nd or 3rd nearest shelter so we don't all start from the same point
+        seeded = np.tile(np.asarray(self._greedy_chromosome, dtype=self._gene_dtype), (greedy_count, 1))
+        rows, genes = self._random_sites(seeded.shape, 0.15)
+        # Pick one of the 3 nearest shelters (weighted by distance)
+        picks = self._rng.integers(0, self._nearest3.shape[1], size=len(genes))
+        seeded[rows, genes] = self._nearest3[genes, picks]
+
+        # Purely random — ensures exploration
+        randoms = self._rng.integers(0, n_shelters, size=(random_count, n_risk),
+                                     dtype=self._gene_dtype)
+
+        return np.concatenate((seeded, randoms))
+
+    def _prepare_fitness_arrays(self):
+        """
+        Precompute the dense arrays _fitness_batch works on (on top of the
+        _pops / _caps columns from _build_columns). Called once the cost
+        matrices are final.
+          _link_cost  : (n_risk, n_shelters) float32 pop × (dist + 0.5 × time),
+                        with disconnected pairs given the 1,000,000 fallback cost
+        """
+        dist = np.where(np.isfinite(self.dist_matrix), self.dist_matrix, 1_000_000)
+        t = np.where(np.isfinite(self.time_matrix), self.time_matrix, 1_000_000)
+        # Contiguous float32: the gather in population_fitness is memory-bound
+        self._link_cost = np.ascontiguousarray((dist + 0.5 * t) * self._pops[:, None], dtype=np.float32)
+        self._bincount_layouts = {}
+        self._fitness_pool = None
+        self._island_pool = None
+        self._link_cost_shm = None
+        # In-process scorer specialised once on the now-immutable arrays
+        self._score = partial(score_population, link_cost=self._link_cost, pops=self._pops,
+                              caps=self._caps, capacity_penalty=self.CAPACITY_PENALTY,
+                              layouts=self._bincount_layouts, block_genes=self.FITNESS_BLOCK_GENES)
 
     def _fitness(self, chromosome):
+        """Fitness of a single chromosome (see population_fitness)."""
+        # One row: straight to the in-process kernel, no dedup or pool dispatch
+        return float(self._score(np.asarray(chromosome)[None, :])[0])
+
+    def _fitness_batch(self, population):
+        """
+        Fitness of every row of a population array (see population_fitness).
+        Identical chromosomes (elites, converged offspring) are scored once.
+        With an open fitness pool, rows are scored in chunks across workers.
+        """
+        # Each row viewed as one opaque bytes key, so np.unique dedups whole rows
+        rows = np.ascontiguousarray(population)
+        keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        if len(first) < len(rows):
+            return self._score_rows(rows[first])[inverse.ravel()]
+        return self._score_rows(rows)
+
+    def _score_rows(self, population):
+        pool = self._fitness_pool
+        if pool is not None and len(population) >= 2 * self.fitness_workers:
+            chunks = np.array_split(population, self.fitness_workers)
+            return np.concatenate(list(pool.map(_fitness_chunk, chunks)))
+        return self._score(population)
+
+    def _open_fitness_pool(self):
+        """
+        Master-slave evaluation: start fitness_workers processes that receive
+        the cost arrays once via the initializer, not with every chunk.
+        """
+        if self.fitness_workers > 1:
+            self._fitness_pool = ProcessPoolExecutor(
+                max_workers=self.fitness_workers,
+                initializer=_init_fitness_worker,
+                initargs=(self._share_link_cost(), self._pops, self._caps, self.CAPACITY_PENALTY,
+                          self.FITNESS_BLOCK_GENES),
+            )
+
+    def _close_fitness_pool(self):
+        if self._fitness_pool is not None:
+            self._fitness_pool.shutdown()
+            self._fitness_pool = None
+        self._release_link_cost()
+
+    def _share_link_cost(self):
+        """
+        Copy _link_cost into a shared-memory block (once per run) and return
+        the (name, shape, dtype) workers attach to: every pool process reads
+        the one (n_risk, n_shelters) table instead of holding its own copy.
         """
-        Multi-factor fitness (lower = better):
-          - Weighted sum of flood-aware network distance per person
-          - Weighted sum of travel time per person
-          - Heavy capacity overflow penalty
-        """
-        total_dist = 0.0
-        total_time = 0.0
-        shelter_counts = defaultdict(int)
-
-        for i, j in enumerate(chromosome):
-            pop = self.at_risk_nodes[i]['pop']
-            dist = self.dist_matrix[i, j]
-            t = self.time_matrix[i, j]
-
-            # If infinite (disconnected), use a large fallback
-            if not math.isfinite(dist):
-                dist = 1_000_000
-            if not math.isfinite(t):
-                t = 1_000_000
-
-            total_dist += dist * pop
-            total_time += t * pop
-            shelter_counts[j] += pop
-
-        # Combine: distance is the primary factor, time adds secondary weight.
-        # Penalty is quadratic so that putting 1000 extra people in 1 shelter
-        # is mathematically *much* worse than putting 100 extra people in 10 shelters.
-        penalty = 0.0
-        for j, count in shelter_counts.items():
-            cap = self.safe_shelters[j]['capacity']
-            if count > cap:
-                penalty += ((count - cap) ** 2) * self.CAPACITY_PENALTY
-
-        return total_dist + 0.5 * total_time + penalty
-
-    def _selection(self, population, fitness_scores):
-        """Tournament selection with k=3."""
-        idxs = random.sample(range(len(population)), min(3, len(population)))
-        best = min(idxs, key=lambda i: fitness_scores[i])
-        return population[best]
-
-    def _crossover(self, p1, p2):
-        """Two-point crossover for less disruptive recombination."""
-        n = len(p1)
+        if self._link_cost_shm is None:
+            cost = self._link_cost
+            self._link_cost_shm = SharedMemory(create=True, size=max(1, cost.nbytes))
+            np.ndarray(cost.shape, dtype=cost.dtype, buffer=self._link_cost_shm.buf)[...] = cost
+        return self._link_cost_shm.name, self._link_cost.shape, self._link_cost.dtype.str
+
+    def _release_link_cost(self):
+        if self._link_cost_shm is not None:
+            self._link_cost_shm.close()
+            self._link_cost_shm.unlink()
+            self._link_cost_shm = None
+
+    def _open_island_pool(self, n_islands):
+        """
+        Island-parallel evolution: start island_workers processes that each
+        get the cost arrays once via the initializer, then evolve whole
+        islands between migrations. Each island draws from its own child
+        Generator spawned from the GA's, in the pool or in-process alike, so
+        a seeded run gives the same result whatever island_workers is.
+        """
+        self._island_rngs = self._rng.spawn(n_islands)
+        workers = min(self.island_workers, n_islands)
+        if workers > 1:
+            self._island_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_island_worker,
+                initargs=(self._share_link_cost(), self._pops, self._caps, self.CAPACITY_PENALTY,
+                          self.FITNESS_BLOCK_GENES, self._nearest3, self.mutation_rate),
+            )
+
+    def _close_island_pool(self):
+        if self._island_pool is not None:
+            self._island_pool.shutdown()
+            self._island_pool = None
+        self._release_link_cost()
+
+    def _evolve_islands(self, islands, scores, generations):
+        """
+        _evolve every island for `generations` generations: in the island
+        pool when one is open (one task per island), else in turn in-process.
+        Returns [(population, fitness_scores), ...] in island order.
+        """
+        pool = self._island_pool
+        if pool is None:
+            ga_rng, evolved = self._rng, []
+            try:
+                for island, fit, rng in zip(islands, scores, self._island_rngs):
+                    self._rng = rng
+                    evolved.append(self._evolve(island, generations, fit))
+            finally:
+                self._rng = ga_rng
+            return evolved
+        futures = [pool.submit(_evolve_island, island, generations, fit, rng)
+                   for island, fit, rng in zip(islands, scores, self._island_rngs)]
+        evolved = [f.result() for f in futures]
+        self._island_rngs = [rng for _, _, rng in evolved]
+        return [(pop, fit) for pop, fit, _ in evolved]
+
+    def _evolve(self, population, generations, fitness_scores=None):
+        """
+        Run `generations` generations of elitist GA on one (sub-)population.
+        Each generation is built with whole-array operators: one tournament
+        for all parents, one masked two-point crossover, one mutation scatter.
+        Scores travel with the population, so elites carried over unchanged
+        are never re-evaluated; only new offspring are scored.
+        Returns (population, fitness_scores).
+        """
+        size, n_risk = population.shape
+        elite_n = max(1, size // 10)  # top 10% preserved each gen
+        n_children = size - elite_n
+        n_pairs = (n_children + 1) // 2
+        # Two generation buffers used in turn: elites are copied into the
+        # head and crossover writes offspring straight into the tail, so a
+        # generation allocates no population array of its own
+        buffers = [np.empty((elite_n + 2 * n_pairs, n_risk), dtype=population.dtype)
+                   for _ in range(2)]
+        if fitness_scores is None:
+            fitness_scores = self._fitness_batch(population)
+
+        for gen in range(generations):
+            nxt = buffers[gen % 2]
+            # Elite preservation — carry best chromosomes unchanged
+            # (argpartition: only the elite_n best are needed, not a full ranking)
+            elite_idx = np.argpartition(fitness_scores, elite_n - 1)[:elite_n]
+            nxt[:elite_n] = population[elite_idx]
+
+            parents = self._selection(population, fitness_scores, 2 * n_pairs)
+            self._crossover(parents[0::2], parents[1::2], nxt[elite_n:].reshape(n_pairs, 2, n_risk))
+            # Siblings are already interleaved (c1, c2, c1, c2, ...); drop a trailing extra
+            children = self._mutate(nxt[elite_n:size])
+
+            population = nxt[:size]
+            fitness_scores = np.concatenate((fitness_scores[elite_idx], self._fitness_batch(children)))
+
+        return population, fitness_scores
+
+    def _migrate(self, islands, scores):
+        """
+        Ring migration: the best migration_rate fraction of island k
+        overwrites the worst chromosomes of island (k + 1) % K. Migrants
+        bring their scores along, so no island needs re-scoring.
+        """
+        migrants = []
+        for island, fit in zip(islands, scores):
+            m = max(1, int(len(island) * self.migration_rate))
+            best = np.argpartition(fit, m - 1)[:m]
+            migrants.append((island[best].copy(), fit[best].copy()))
+
+        for k, (island, fit) in enumerate(zip(islands, scores)):
+            incoming, incoming_fit = migrants[k - 1]
+            n_in = min(len(incoming), len(fit))
+            worst = np.argpartition(fit, len(fit) - n_in)[len(fit) - n_in:]
+            island[worst] = incoming[:len(worst)]
+            fit[worst] = incoming_fit[:len(worst)]
+        return islands, scores
+
+    def _selection(self, population, fitness_scores, n):
+        """Tournament selection with k=3 (distinct entrants), n winners at once."""
+        size = len(population)
+        k = min(3, size)
+        # k distinct random entrants per tournament, by Floyd's sampling:
+        # O(n × k) draws rather than a random key for every population member
+        entrants = np.empty((n, k), dtype=np.intp)
+        for col, top in enumerate(range(size - k, size)):
+            pick = self._rng.integers(0, top + 1, size=n)
+            taken = (entrants[:, :col] == pick[:, None]).any(axis=1)
+            entrants[:, col] = np.where(taken, top, pick)
+        winners = entrants[np.arange(n), fitness_scores[entrants].argmin(axis=1)]
+        return population[winners]
+
+    def _crossover(self, p1, p2, out):
+        """
+        Two-point crossover for less disruptive recombination, applied
+        row-wise to two (n_pairs, n_risk) parent arrays with per-pair cuts.
+        Siblings are written straight into out, a reusable (n_pairs, 2, n_risk)
+        buffer, so each generation allocates no child arrays of its own.
+        """
+        n_pairs, n = p1.shape
+        out[:, 0] = p1
+        out[:, 1] = p2
         if n < 3:
-            return list(p1), list(p2)
-        a, b = sorted(random.sample(range(n), 2))
-        c1 = p1[:a] + p2[a:b] + p1[b:]
-        c2 = p2[:a] + p1[a:b] + p2[b:]
-        return c1, c2
+            return out
+        # Two distinct cut points per pair: draw b from n-1 slots, skipping a
+        a = self._rng.integers(0, n, size=n_pairs)
+        b = self._rng.integers(0, n - 1, size=n_pairs)
+        b += b >= a
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        genes = np.arange(n)
+        swap = (genes >= lo[:, None]) & (genes < hi[:, None])
+        np.copyto(out[:, 0], p2, where=swap)
+        np.copyto(out[:, 1], p1, where=swap)
+        return out
+
+    def _random_sites(self, shape, rate):
+        """
+        (rows, cols) of the genes hit when each gene of a `shape` array is
+        picked independently with probability `rate`: the hit count is drawn
+        from the matching binomial and the sites sampled without replacement,
+        so no full-size random matrix is generated.
+        """
+        n_genes = shape[0] * shape[1]
+        hits = self._rng.binomial(n_genes, rate)
+        return np.divmod(self._rng.choice(n_genes, hits, replace=False), shape[1])
 
-    def _mutate(self, chrom):
+    def _mutate(self, chroms):
         """
         Mutation: with probability mutation_rate, reassign a node to one of
         its 3 nearest shelters (distance-biased) rather than purely random.
-        This keeps mutations locally sensible.
-        """
-        for i in range(len(chrom)):
-            if random.random() < self.mutation_rate:
-                # Prefer nearby shelters — pick from top-3 nearest
-                nearest3 = np.argsort(self.dist_matrix[i])[:3]
-                chrom[i] = int(random.choice(nearest3))
-        return chrom
+        This keeps mutations locally sensible. Works on a (n, n_risk) array;
+        mutation sites and replacement shelters are drawn in bulk.
+        """
+        rows, genes = self._random_sites(chroms.shape, self.mutation_rate)
+        if genes.size:
+            # Prefer nearby shelters — pick from top-3 nearest
+            picks = self._rng.integers(0, self._nearest3.shape[1], size=genes.size)
+            chroms[rows, genes] = self._nearest3[genes, picks]
+        return chroms
+
+
+class _IslandEvolver(EvolutionMixin):
+    """
+    Just enough of a planner for EvolutionMixin._evolve in an island worker:
+    the fitness arrays and mutation table, without the graph or matrices.
+    """
+
+    def __init__(self, link_cost, pops, caps, capacity_penalty, block_genes,
+                 nearest3, mutation_rate):
+        self._nearest3 = nearest3
+        self.mutation_rate = mutation_rate
+        self._fitness_pool = None
+        self._score = partial(score_population, link_cost=link_cost, pops=pops, caps=caps,
+                              capacity_penalty=capacity_penalty, layouts={},
+                              block_genes=block_genes)
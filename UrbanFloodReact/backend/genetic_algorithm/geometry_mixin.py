@@ -1,13 +1,30 @@
-import networkx as nx
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
 
 class GeometryMixin:
+    def _node_kdtree(self):
+        """
+        (cKDTree over node (x, y), node ids) for every node with coordinates,
+        built once per planner and reused by every nearest-node fallback.
+        Returns None if no node has coordinates.
+        """
+        cached = getattr(self, '_node_tree', None)
+        if cached is None:
+            node_ids = [n for n, data in self.G.nodes(data=True) if 'x' in data and 'y' in data]
+            if not node_ids:
+                return None
+            xy = np.array([(self.G.nodes[n]['x'], self.G.nodes[n]['y']) for n in node_ids], dtype=float)
+            cached = self._node_tree = (cKDTree(xy), node_ids)
+        return cached
+
     def _find_nearest_node_robust(self, lat, lon):
         """
         3-strategy fallback to always resolve a (lat, lon) to a valid graph node.
         Ported from find_nearest_node_robust() in the old evacuation_algorithms.py.
 
         Strategy 1: ox.distance.nearest_nodes (fast BallTree spatial index)
-        Strategy 2: manual Euclidean brute-force over all nodes
+        Strategy 2: Euclidean nearest node via a cached KD-tree
         Strategy 3: first node in graph (last resort)
         """
         import osmnx as ox
@@ -17,21 +34,92 @@ class GeometryMixin:
         except Exception:
             pass
         try:
-            min_dist = float('inf')
-            nearest = None
-            for node, data in self.G.nodes(data=True):
-                if 'x' in data and 'y' in data:
-                    dist = ((lon - data['x']) ** 2 + (lat - data['y']) ** 2) ** 0.5
-                    if dist < min_dist:
-                        min_dist = dist
-                        nearest = node
-            if nearest is not None:
-                return nearest
+            cached = self._node_kdtree()
+            if cached is not None:
+                tree, node_ids = cached
+                return node_ids[tree.query((lon, lat))[1]]
         except Exception:
             pass
         # Last resort: return the first node in the graph
         return next(iter(self.G.nodes()))
 
+    def _snap_points(self, lats, lons):
+        """
+        Resolve many (lat, lon) points to graph nodes with one batched
+        ox.distance.nearest_nodes call (one spatial index build and query),
+        falling back to one query of the cached KD-tree if that fails.
+        """
+        import osmnx as ox
+        if not lats:
+            return []
+        try:
+            return list(ox.distance.nearest_nodes(self.G, list(lons), list(lats)))
+        except Exception:
+            pass
+        cached = self._node_kdtree()
+        if cached is None:
+            return [self._find_nearest_node_robust(lat, lon) for lat, lon in zip(lats, lons)]
+        tree, node_ids = cached
+        _, idx = tree.query(np.column_stack((lons, lats)))
+        return [node_ids[k] for k in idx]
+
+    def _snap_shelters(self, shelter_idx):
+        """
+        {shelter index: graph node} for the given shelters, snapping those
+        whose node_id is missing or not in G by lat/lon in one batch. Snaps
+        are cached on the planner, so each shelter is resolved at most once.
+        """
+        snapped = getattr(self, '_snapped_nodes', None)
+        if snapped is None:
+            snapped = self._snapped_nodes = {}
+        stale = [j for j in shelter_idx if ('shelter', j) not in snapped
+                 and not self.G.has_node(self.safe_shelters[j].get('node_id'))]
+        nodes = self._snap_points([self.safe_shelters[j]['lat'] for j in stale],
+                                  [self.safe_shelters[j]['lon'] for j in stale])
+        for j, node in zip(stale, nodes):
+            snapped[('shelter', j)] = node
+            print(f"  [SNAP] shelter '{self.safe_shelters[j]['id']}' snapped to node {node} via lat/lon")
+        return {j: snapped.get(('shelter', j), self.safe_shelters[j].get('node_id'))
+                for j in shelter_idx}
+
+    def _segment_coords(self, u, v):
+        """
+        [lon, lat] waypoint list of the u → v road segment, taken from the
+        shortest parallel edge (matches Dijkstra). Cached per (u, v) pair, so
+        segments shared by many evacuees' paths are resolved (and converted
+        to Python floats) once.
+        """
+        cache = getattr(self, '_segment_cache', None)
+        if cache is None:
+            cache = self._segment_cache = {}
+        seg = cache.get((u, v))
+        if seg is not None:
+            return seg
+
+        # OSMnx uses MultiDiGraph: G[u][v] = {0: {edge_data}, 1: ...}
+        edge_dict = self.G.get_edge_data(u, v)
+        geom = None
+        if edge_dict is not None:
+            # Pick the parallel edge with the shortest length (matches Dijkstra)
+            if isinstance(next(iter(edge_dict.values())), dict):
+                best = min(edge_dict.values(),
+                           key=lambda d: d.get('length', float('inf')))
+            else:
+                best = edge_dict
+            geom = best.get('geometry')  # Shapely LineString or None
+
+        if geom is not None:
+            # float64: float32 would move lon/lat by up to ~1 m
+            seg = np.asarray(geom.coords, dtype=np.float64)[:, :2].tolist()
+        else:
+            # No edge (defensive) or no geometry stored — straight line between the two nodes
+            seg = [
+                [float(self.G.nodes[u]['x']), float(self.G.nodes[u]['y'])],
+                [float(self.G.nodes[v]['x']), float(self.G.nodes[v]['y'])],
+            ]
+        cache[(u, v)] = seg
+        return seg
+
     def _path_to_coords(self, path_nodes):
         """
         Convert a list of node IDs into [lon, lat] coordinate pairs that follow
@@ -41,52 +129,70 @@ class GeometryMixin:
         (G[u][v][key]['geometry']).  Using only node coordinates (intersections)
         loses all intermediate waypoints, making curved/diagonal roads appear
         as straight lines on the map.
+        Waypoints are the cached segment lists' own [lon, lat] pairs, shared
+        between paths, so callers must treat them as read-only.
         """
         coords = []
-        for k in range(len(path_nodes) - 1):
-            u, v = path_nodes[k], path_nodes[k + 1]
-
-            # OSMnx uses MultiDiGraph: G[u][v] = {0: {edge_data}, 1: ...}
-            edge_dict = self.G.get_edge_data(u, v)
-            if edge_dict is None:
-                # Defensive: no edge found, use straight node-to-node segment
-                if k == 0:
-                    coords.append([self.G.nodes[u]['x'], self.G.nodes[u]['y']])
-                coords.append([self.G.nodes[v]['x'], self.G.nodes[v]['y']])
-                continue
-
-            # Pick the parallel edge with the shortest length (matches Dijkstra)
-            if isinstance(next(iter(edge_dict.values())), dict):
-                best = min(edge_dict.values(),
-                           key=lambda d: d.get('length', float('inf')))
-            else:
-                best = edge_dict
-
-            geom = best.get('geometry')  # Shapely LineString or None
-            if geom is not None:
-                seg = [[c[0], c[1]] for c in geom.coords]
-            else:
-                # No geometry stored — straight line between the two nodes
-                seg = [
-                    [self.G.nodes[u]['x'], self.G.nodes[u]['y']],
-                    [self.G.nodes[v]['x'], self.G.nodes[v]['y']],
-                ]
-
-            if k == 0:
-                coords.extend(seg)          # include the start node
-            else:
-                coords.extend(seg[1:])      # skip duplicate junction point
+        for u, v in zip(path_nodes, path_nodes[1:]):
+            seg = self._segment_coords(u, v)
+            # Keep the start node, then skip each segment's duplicate junction point
+            coords.extend(seg[1:] if coords else seg)
+        if coords:
+            return coords
 
         # Edge case: single-node path (origin == destination)
-        if not coords and path_nodes:
+        if path_nodes:
             n = path_nodes[0]
-            coords = [[self.G.nodes[n]['x'], self.G.nodes[n]['y']]]
+            return [[self.G.nodes[n]['x'], self.G.nodes[n]['y']]]
+        return []
 
-        return coords
+    def _shelter_route_trees(self, shelter_nodes):
+        """
+        One compiled Dijkstra over the *reversed* flood_weight graph from every
+        used shelter. Following the predecessor rows from a node walks the
+        cheapest node → shelter route in the original edge direction.
+        Trees are kept per shelter node, so later _decode calls only search
+        from shelters they have not seen before.
+        Returns (node_index, node_ids, predecessors (n_used, N)).
+        """
+        node_index, reverse_csr = self._get_csr('flood_weight', reverse=True)
+        node_ids = list(node_index)
+
+        trees = getattr(self, '_route_trees', None)
+        if trees is None:
+            trees = self._route_trees = {}
+        missing = [n for n in dict.fromkeys(shelter_nodes) if n not in trees]
+        if missing:
+            _, pred = dijkstra(reverse_csr, directed=self.G.is_directed(),
+                               indices=[node_index[n] for n in missing], return_predecessors=True)
+            trees.update(zip(missing, pred))
+        return node_index, node_ids, np.array([trees[n] for n in shelter_nodes])
 
     def _decode(self, chromosome):
+        risk_lat, risk_lon = self._risk_lat.tolist(), self._risk_lon.tolist()
+        shelter_lat, shelter_lon = self._shelter_lat.tolist(), self._shelter_lon.tolist()
+
+        # ── Resolve shelter and at-risk nodes (snapped once, batched) ───────
+        # This is the primary cause of straight-line routes: shelter.node_id
+        # is None or belongs to a different graph copy.
+        used = sorted({int(j) for j in chromosome})
+        shelter_node_of = self._snap_shelters(used)
+        snapped = self._snapped_nodes
+        stale_risk = [i for i, node_info in enumerate(self.at_risk_nodes)
+                      if ('risk', i) not in snapped and not self.G.has_node(node_info['id'])]
+        snapped_to = self._snap_points([risk_lat[i] for i in stale_risk],
+                                       [risk_lon[i] for i in stale_risk])
+        for i, node in zip(stale_risk, snapped_to):
+            snapped[('risk', i)] = node
+            print(f"  [DECODE] at-risk node snapped to {node} via nearest-node lookup")
+
+        # Route trees from every used shelter in one call, reused for all nodes
+        node_index, node_ids, pred = self._shelter_route_trees([shelter_node_of[j] for j in used])
+        tree_row = {j: r for r, j in enumerate(used)}
+
         results = []
         for i, j in enumerate(chromosome):
+            j = int(j)
             node_info = self.at_risk_nodes[i]
             shelter   = self.safe_shelters[j]
             pop       = node_info['pop']
@@ -94,37 +200,32 @@ class GeometryMixin:
 
             # Straight-line — only kept if all snapping + pathfinding fails
             path_coords = [
-                [node_info['lon'], node_info['lat']],
-                [shelter['lon'],   shelter['lat']],
+                [risk_lon[i],    risk_lat[i]],
+                [shelter_lon[j], shelter_lat[j]],
             ]
             fallback = True
 
-            # ── Resolve at-risk node ──────────────────────────────────────────
-            # at_risk node_id is already a graph node, but guard against stale copies
-            if not self.G.has_node(node_id):
-                node_id = self._find_nearest_node_robust(node_info['lat'], node_info['lon'])
-                print(f"  [DECODE] at-risk node snapped to {node_id} via nearest-node lookup")
-
-            # ── Resolve shelter node ─────────────────────────────────────────
-            # This is the primary cause of straight-line routes: shelter.node_id
-            # is None or belongs to a different graph copy.
-            shelter_node = shelter.get('node_id')
-            if shelter_node is None or not self.G.has_node(shelter_node):
-                shelter_node = self._find_nearest_node_robust(shelter['lat'], shelter['lon'])
-                print(f"  [DECODE] shelter '{shelter['id']}' snapped to node {shelter_node} via lat/lon")
+            # at_risk node_id is already a graph node; stale copies were snapped above
+            node_id = snapped.get(('risk', i), node_id)
 
             # ── Path geometry via flood-aware shortest path ───────────────────
-            try:
-                path_nodes = nx.shortest_path(
-                    self.G, node_id, shelter_node, weight='flood_weight'
-                )
+            # Walk the shelter's predecessor row from the node to the shelter
+            row = pred[tree_row[j]]
+            target = node_index[shelter_node_of[j]]
+            cur = node_index[node_id]
+            path_idx = [cur]
+            while cur != target and cur >= 0:
+                cur = row[cur]
+                path_idx.append(cur)
+
+            if cur >= 0:
                 # Extract full road geometry (edge waypoints), not just node coords.
                 # This prevents diagonal/curved roads from appearing as straight lines.
-                path_coords = self._path_to_coords(path_nodes)
+                path_coords = self._path_to_coords([node_ids[k] for k in path_idx])
                 fallback = False
-            except Exception as e:
+            else:
                 # Truly disconnected — keep straight-line and flag it
-                print(f"  [DECODE] no road path from {node_id} to {shelter_node}: {e}")
+                print(f"  [DECODE] no road path from {node_id} to {shelter_node_of[j]}")
 
             results.append({
                 'from_node':  node_info['id'],
@@ -1,8 +1,9 @@
-import math
 import time
 import requests
 import numpy as np
 import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
 from traffic_data.tomtom import get_bulk_traffic_data
 
 # ── MOCK FLAG — set True to bypass TomTom API and inject fake congestion data ──
@@ -10,6 +11,9 @@ from traffic_data.tomtom import get_bulk_traffic_data
 # Set back to False for real traffic data.
 MOCK_TRAFFIC = False
 
+# Rough metres per degree of lat/lon, for straight-line fallback distances
+METRES_PER_DEGREE = 111_000
+
 class SetupMixin:
     # def _fetch_google_traffic_speed(self, start_coord, end_coord):
     #     """
@@ -113,18 +117,18 @@ class SetupMixin:
         if MOCK_TRAFFIC:
             print("  [GA DEBUG] *** MOCK_TRAFFIC=True — using seeded congestion data ***")
             import random
-            random.seed(42)  # deterministic so same run = same pins
+            rng = random.Random(42)  # deterministic so same run = same pins
             count = 0
             congested_count = 0
             free_flow_base = 30.0  # seconds, typical free flow for a short segment
             for u, v, k in edge_refs:
-                r = random.random()
+                r = rng.random()
                 if r < 0.40:        # 40% heavy
-                    factor = random.uniform(2.5, 4.5)
+                    factor = rng.uniform(2.5, 4.5)
                 elif r < 0.70:      # 30% moderate
-                    factor = random.uniform(1.1, 1.9)
+                    factor = rng.uniform(1.1, 1.9)
                 else:               # 30% clear
-                    factor = random.uniform(0.9, 1.04)
+                    factor = rng.uniform(0.9, 1.04)
                 self.G[u][v][k]['traffic_time'] = round(free_flow_base * factor, 1)
                 self.G[u][v][k]['free_flow_time'] = free_flow_base
                 count += 1
@@ -205,114 +209,337 @@ class SetupMixin:
 
     def _add_flood_edge_weights(self):
         """
-        Annotate every edge with 'flood_weight':
+        Compute every edge's 'flood_weight':
             flood_weight = length × (1 + FLOOD_PENALTY_FACTOR × avg_water_depth)
                            × (1 + TRAFFIC_PENALTY IF CONGESTED)
+        Edge attributes are read in one pass into arrays and the weights are
+        computed as whole-array expressions. They are kept only as
+        self._edge_table (and the CSR exports built from it): nothing reads
+        'flood_weight' back off the graph, so no per-edge write-back.
+        New weights invalidate every CSR export and route tree built so far.
         """
-        for u, v, k, data in self.G.edges(keys=True, data=True):
-            base_len = data.get('length', 1.0)
-            
-            # 1. Flood Penalty
-            depth_u = self.G.nodes[u].get('water_depth', 0.0)
-            depth_v = self.G.nodes[v].get('water_depth', 0.0)
-            avg_depth = (depth_u + depth_v) / 2.0
-            flood_factor = (1.0 + self.FLOOD_PENALTY_FACTOR * avg_depth)
-            
-            # 2. Traffic Penalty (TomTom Data OR Simulation Fallback)
-            traffic_factor = 1.0
-            
-            if 'traffic_time' in data:
-                # If we have real data from TomTom
-                free_flow_time = data.get('free_flow_time', max(0.1, base_len / 13.8))
-                actual_time = data['traffic_time']
-                
-                if actual_time > free_flow_time:
-                     traffic_factor = min(5.0, actual_time / free_flow_time)
-            
-            # Combined Weight
-            # We multiply length by these factors to make the "effective distance" longer
-            # effectively routing around floods AND traffic jams.
-            flood_w = max(0.1, base_len * flood_factor * traffic_factor) # Ensure positive weight
-            self.G[u][v][k]['flood_weight'] = flood_w   # ← write back so Dijkstra uses it
-            
+        node_index = self._graph_node_index()
+        depth = np.array([d.get('water_depth', 0.0) for _, d in self.G.nodes(data=True)],
+                         dtype=np.float64)
+
+        # One walk over the edge view, one row per edge (each G.edges() pass
+        # rebuilds the adjacency iteration, so separate comprehensions cost
+        # ~2.5x); NaN marks "attribute not set" in the traffic columns
+        nan = np.nan
+        table = np.array([(node_index[u], node_index[v], d.get('length', 1.0),
+                           d.get('traffic_time', nan), d.get('free_flow_time', nan))
+                          for u, v, d in self.G.edges(data=True)],
+                         dtype=np.float64).reshape(-1, 5)
+        src = table[:, 0].astype(np.int64)
+        dst = table[:, 1].astype(np.int64)
+        base_len, actual_time, free_flow_time = table[:, 2], table[:, 3], table[:, 4]
+
+        # 1. Flood Penalty
+        avg_depth = (depth[src] + depth[dst]) / 2.0
+        flood_factor = 1.0 + self.FLOOD_PENALTY_FACTOR * avg_depth
+
+        # 2. Traffic Penalty (TomTom Data OR Simulation Fallback)
+        # Only edges with real TomTom data can be congested
+        free_flow_time = np.where(np.isnan(free_flow_time), np.maximum(0.1, base_len / 13.8), free_flow_time)
+        congested = actual_time > free_flow_time  # False wherever traffic_time is NaN
+        traffic_factor = np.where(congested, np.minimum(5.0, actual_time / free_flow_time), 1.0)
+
+        # Combined Weight
+        # We multiply length by these factors to make the "effective distance" longer
+        # effectively routing around floods AND traffic jams.
+        flood_w = np.maximum(0.1, base_len * flood_factor * traffic_factor)  # Ensure positive weight
+
+        self._edge_table = (node_index, src, dst, {'flood_weight': flood_w, 'length': base_len})
+        self._csr_cache = {}
+        self._route_trees = {}
+
+    def _graph_node_index(self):
+        """
+        node → row index in G.nodes() order, used by every array/CSR export.
+        Taken from the flood simulator when one was passed in as node_index
+        (same graph, same order), else built once.
+        """
+        node_index = getattr(self, '_node_index', None)
+        if node_index is None or len(node_index) != self.G.number_of_nodes():
+            node_index = self._node_index = {n: i for i, n in enumerate(self.G.nodes())}
+        return node_index
+
+    def _build_columns(self):
+        """
+        Copy the per-node / per-shelter fields the hot paths read out of the
+        at_risk_nodes / safe_shelters dict lists into flat NumPy columns
+        (structure of arrays), once, instead of a dict lookup per gene.
+        """
+        risk, shelters = self.at_risk_nodes, self.safe_shelters
+        self._risk_ids     = np.array([n['id'] for n in risk], dtype=object)
+        self._pops         = np.array([n['pop'] for n in risk], dtype=np.float64)
+        self._risk_lat     = np.array([n['lat'] for n in risk], dtype=np.float64)
+        self._risk_lon     = np.array([n['lon'] for n in risk], dtype=np.float64)
+        self._shelter_ids  = np.array([s['id'] for s in shelters], dtype=object)
+        self._caps         = np.array([s['capacity'] for s in shelters], dtype=np.float64)
+        self._shelter_lat  = np.array([s['lat'] for s in shelters], dtype=np.float64)
+        self._shelter_lon  = np.array([s['lon'] for s in shelters], dtype=np.float64)
+
+    def _shelter_index_dtype(self):
+        """
+        Narrowest integer dtype for shelter-index genes: uint8 up to 256
+        shelters (the usual case), uint16 up to 65,536, else int32. Only for
+        arrays that are indexed with, never subtracted.
+        """
+        n_shelters = len(self.safe_shelters)
+        if n_shelters <= 1 << 8:
+            return np.uint8
+        if n_shelters <= 1 << 16:
+            return np.uint16
+        return np.int32
+
+    def _edge_arrays(self, weights):
+        """
+        (node_index, src, dst, [values per weight]) for every edge of G, from
+        the _edge_table cache when it holds these weights, else one walk over
+        G (missing attributes count as 1, like NetworkX).
+        """
+        table = getattr(self, '_edge_table', None)
+        if table is not None and all(w in table[3] for w in weights):
+            # Arrays already gathered by _add_flood_edge_weights
+            node_index, src, dst, columns = table
+            return node_index, src, dst, [columns[w] for w in weights]
+
+        node_index = self._graph_node_index()
+        src, dst, vals = [], [], [[] for _ in weights]
+        for u, v, data in self.G.edges(data=True):
+            src.append(node_index[u])
+            dst.append(node_index[v])
+            for w, col in zip(weights, vals):
+                col.append(data.get(w, 1))
+        return (node_index, np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64),
+                [np.asarray(col, dtype=np.float64) for col in vals])
+
+    def _graph_to_csr(self, weights):
+        """
+        Export the road graph as SciPy CSR adjacency matrices, one per edge
+        attribute in `weights` (missing attributes count as 1, like NetworkX).
+        Parallel edges collapse to their cheapest weight, matching what
+        Dijkstra would pick. Returns (node_index, [csr, ...]).
+        """
+        node_index, src, dst, vals = self._edge_arrays(weights)
+        n = len(node_index)
+
+        matrices = []
+        for col in vals:
+            w = np.asarray(col, dtype=np.float64)
+            # Cheapest edge first within each (src, dst) pair, then keep one
+            order = np.lexsort((w, dst, src))
+            s_, d_, w_ = src[order], dst[order], w[order]
+            first = np.ones(len(s_), dtype=bool)
+            first[1:] = (s_[1:] != s_[:-1]) | (d_[1:] != d_[:-1])
+            matrices.append(csr_matrix((w_[first], (s_[first], d_[first])), shape=(n, n)))
+        return node_index, matrices
+
+    def _get_csr(self, weight, reverse=False):
+        """
+        (node_index, CSR matrix) for one edge weight, built once and reused by
+        _compute_matrices and _decode until _add_flood_edge_weights rewrites
+        the weights. reverse=True is the transpose (edges flipped), for
+        searches that run from the targets back to the sources.
+        """
+        cache = getattr(self, '_csr_cache', None)
+        if cache is None:
+            cache = self._csr_cache = {}
+        key = (weight, reverse)
+        if key not in cache:
+            if reverse:
+                node_index, csr = self._get_csr(weight)
+                cache[key] = (node_index, csr.T.tocsr())
+            else:
+                node_index, (csr,) = self._graph_to_csr([weight])
+                cache[key] = (node_index, csr)
+        return cache[key]
+
+    def _route_lengths(self, pred, reverse):
+        """
+        Raw length of every shortest flood_weight route in a Dijkstra
+        predecessor array pred (n_sources, N), summed up the tree by pointer
+        jumping (log2(depth) whole-array steps). `reverse` means pred came
+        from a search over reversed edges. Unreached nodes get 0.
+        """
+        node_index, src, dst, (flood, length) = self._edge_arrays(['flood_weight', 'length'])
+        n = len(node_index)
+        if not self.G.is_directed():
+            src, dst = np.concatenate((src, dst)), np.concatenate((dst, src))
+            flood, length = np.concatenate((flood, flood)), np.concatenate((length, length))
+        # Length of the parallel edge Dijkstra actually took (cheapest flood_weight)
+        order = np.lexsort((flood, dst, src))
+        keys = src[order] * n + dst[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        keys, length = keys[first], np.asarray(length, dtype=np.float64)[order][first]
+
+        n_rows = pred.shape[0]
+        linked = pred >= 0
+        child = np.broadcast_to(np.arange(n), pred.shape)[linked]
+        parent = pred[linked].astype(np.int64)
+        # Tree link parent → child is the original edge child → parent on a reversed search
+        link_keys = child * n + parent if reverse else parent * n + child
+        acc = np.zeros(pred.shape)
+        acc[linked] = length[np.searchsorted(keys, link_keys)]
+
+        hop = np.where(linked, pred, -1).astype(np.int64)
+        row_start = (np.arange(n_rows, dtype=np.int64) * n)[:, None]
+        while True:
+            jump = hop >= 0
+            if not jump.any():
+                return acc
+            at = (row_start + np.where(jump, hop, 0)).ravel()
+            acc = np.where(jump, acc + acc.ravel()[at].reshape(acc.shape), acc)
+            hop = np.where(jump, hop.ravel()[at].reshape(hop.shape), -1)
 
     def _compute_matrices(self):
         """
-        For each shelter, run a single-source Dijkstra to all nodes using
-        flood_weight. This gives O(S × E log V) precomputation — fast because
-        we only do it once before the GA starts.
+        Run Dijkstra from every routable shelter at once on a SciPy CSR export
+        of the graph (compiled multi-source csgraph.dijkstra) with
+        flood_weight. The same search's predecessor tree gives the raw length
+        of each chosen route for the time estimate, so no second pass over the
+        graph is needed. Shelters without a graph node fall back to a
+        Euclidean estimate.
         """
+        inv_speed = 1.0 / self.WALKING_SPEED_MS
+        # Shelters without a usable node_id are snapped once by lat/lon
+        # (shared with _decode), so they get real road costs too. The node
+        # KD-tree is only built when at least one shelter needs snapping
+        stale = any(not self.G.has_node(s.get('node_id')) for s in self.safe_shelters)
+        can_snap = stale and self._node_kdtree() is not None
+        snapped = self._snap_shelters(range(len(self.safe_shelters))) if can_snap else {}
+        routable, unroutable = [], []
         for j, shelter in enumerate(self.safe_shelters):
-            s_node = shelter.get('node_id')
-
+            s_node = snapped.get(j, shelter.get('node_id'))
             if s_node is None or not self.G.has_node(s_node):
-                # Fallback: Euclidean in degrees → approximate metres
-                for i, node in enumerate(self.at_risk_nodes):
-                    d = math.sqrt(
-                        (node['lat'] - shelter['lat']) ** 2 +
-                        (node['lon'] - shelter['lon']) ** 2
-                    ) * 111_000
-                    self.dist_matrix[i, j] = d
-                    self.time_matrix[i, j] = d / self.WALKING_SPEED_MS
-                continue
+                unroutable.append(j)
+            else:
+                routable.append((j, s_node))
 
-            try:
-                # flood-weighted cost (for fitness)
-                flood_lengths = nx.single_source_dijkstra_path_length(
-                    self.G, s_node, weight='flood_weight'
-                )
-                # raw length (for time estimate — we don't slow evacuees by depth,
-                # we just make flooded paths more costly to choose)
-                raw_lengths = nx.single_source_dijkstra_path_length(
-                    self.G, s_node, weight='length'
-                )
-            except Exception:
-                continue
+        if unroutable:
+            # Only on graphs without node coordinates, where nothing can be snapped
+            # Fallback: Euclidean in degrees → approximate metres, every
+            # unroutable shelter column in one broadcast
+            d = np.hypot(self._risk_lat[:, None] - self._shelter_lat[unroutable],
+                         self._risk_lon[:, None] - self._shelter_lon[unroutable]) * METRES_PER_DEGREE
+            self.dist_matrix[:, unroutable] = d
+            self.time_matrix[:, unroutable] = d * inv_speed
+
+        if not routable:
+            return
 
-            for i, node in enumerate(self.at_risk_nodes):
-                r_node = node['id']
-                if r_node in flood_lengths:
-                    self.dist_matrix[i, j] = flood_lengths[r_node]
-                if r_node in raw_lengths:
-                    self.time_matrix[i, j] = raw_lengths[r_node] / self.WALKING_SPEED_MS
+        # Cached: _decode's route trees search the same exports
+        node_index, flood_csr = self._get_csr('flood_weight')
+        cols = np.array([j for j, _ in routable])
+        sources = np.array([node_index[s_node] for _, s_node in routable])
+        directed = self.G.is_directed()
+
+        # At-risk nodes missing from the graph stay unreachable (inf)
+        risk_idx = np.array([node_index.get(node_id, -1) for node_id in self._risk_ids])
+        rows = np.flatnonzero(risk_idx >= 0)
+        if rows.size == 0:
+            return
+        targets = risk_idx[rows]
+
+        # Shelters snapped to the same junction (and repeated at-risk nodes)
+        # share one search: run Dijkstra on distinct graph nodes only, then
+        # expand the results back out
+        src_u, src_inv = np.unique(sources, return_inverse=True)
+        tgt_u, tgt_inv = np.unique(targets, return_inverse=True)
+
+        # Costs stay shelter → node; search from whichever side is smaller
+        # so only min(S, n_risk) rows of N distances are ever materialised
+        if len(tgt_u) < len(src_u):
+            # Reversed edges turn node → shelter searches into shelter → node costs
+            d, pred = dijkstra(self._get_csr('flood_weight', reverse=True)[1],
+                               directed=directed, indices=tgt_u,
+                               return_predecessors=True)
+            length = self._route_lengths(pred, reverse=True)
+            d, length = d[:, src_u], length[:, src_u]
+        else:
+            d, pred = dijkstra(flood_csr, directed=directed, indices=src_u,
+                               return_predecessors=True)
+            length = self._route_lengths(pred, reverse=False)
+            d, length = d[:, tgt_u].T, length[:, tgt_u].T
+        cells = np.ix_(tgt_inv, src_inv)
+
+        # flood-weighted cost (for fitness) and the raw length of that same
+        # route (for the time estimate — we don't slow evacuees by depth, we
+        # just make flooded paths more costly to choose)
+        self.dist_matrix[np.ix_(rows, cols)] = d[cells]
+        self.time_matrix[np.ix_(rows, cols)] = np.where(np.isfinite(d), length * inv_speed, np.inf)[cells]
+
+    def _nearest_shelters(self, k):
+        """
+        Indices of each at-risk node's k nearest shelters by flood-weighted
+        distance, nearest first: an O(S) argpartition per row, then a sort of
+        only those columns instead of a full argsort. The sorted table is
+        cached at (at least) GREEDY_CANDIDATES wide, so greedy seeding and the
+        mutation table share one pass over dist_matrix.
+        """
+        k = min(k, self.dist_matrix.shape[1])
+        order = getattr(self, '_shelter_order', None)
+        if order is None or order.shape[1] < k:
+            width = min(max(k, self.GREEDY_CANDIDATES), self.dist_matrix.shape[1])
+            near = np.argpartition(self.dist_matrix, width - 1, axis=1)[:, :width]
+            near_dist = np.take_along_axis(self.dist_matrix, near, axis=1)
+            order = np.take_along_axis(near, np.argsort(near_dist, axis=1, kind='stable'), axis=1)
+            self._shelter_order = order
+        return order[:, :k]
+
+    # Shelters scanned per node before the greedy pass falls back to a full sort
+    GREEDY_CANDIDATES = 8
 
     def _compute_greedy_chromosome(self):
         """
         Greedy assignment: each at-risk node gets the nearest reachable shelter
         (by flood-weighted distance). Respects capacity — once a shelter is full,
         the next-nearest is tried or overflow distributed to lowest fill ratio.
+        Only the GREEDY_CANDIDATES nearest shelters are sorted up front; a row
+        is fully sorted only when all of them are already full. When every
+        node's nearest shelter can take all of its nearest-shelter demand, the
+        sequential pass would never skip one, so the nearest column is returned
+        straight away.
         """
         n_shelters = len(self.safe_shelters)
-        capacities = [s['capacity'] for s in self.safe_shelters]
+        capacities = self._caps.tolist()
+        pops = self._pops.tolist()
         assigned_counts = [0] * n_shelters
         chromosome = []
+        if n_shelters == 0:
+            return chromosome
+        candidates = self._nearest_shelters(self.GREEDY_CANDIDATES)
+
+        # Uncongested fast path: loads only grow, so if the final nearest-shelter
+        # loads fit, every prefix of the pass fits too
+        nearest = candidates[:, 0]
+        loads = np.bincount(nearest, weights=self._pops, minlength=n_shelters)
+        if np.all(loads <= np.maximum(1.0, self._caps)):
+            return nearest.tolist()
+        candidates = candidates.tolist()
 
         for i in range(len(self.at_risk_nodes)):
-            pop = self.at_risk_nodes[i]['pop']
-            # Sort shelters by flood-weighted distance
-            order = np.argsort(self.dist_matrix[i])
-            
-            chosen = int(order[0])
-            best_overflow_j = chosen
-            min_ratio = float('inf')
+            pop = pops[i]
+            # Nearest shelters first; a full argsort only if all candidates are full
+            chosen = next((j for j in candidates[i]
+                           if (assigned_counts[j] + pop) / max(1.0, capacities[j]) <= 1.0), None)
 
-            for j in order:
-                j = int(j)
-                ratio = (assigned_counts[j] + pop) / max(1.0, capacities[j])
-                
-                # If there's physical space, take it immediately
-                if ratio <= 1.0:
-                    chosen = j
-                    break
-                
-                # Otherwise, track the shelter with the least proportional overflow
-                if ratio < min_ratio:
-                    min_ratio = ratio
-                    best_overflow_j = j
-            else:
-                # Loop exhausted: all shelters are over capacity. 
-                # Pick the one with the smallest overflow ratio instead of the absolute nearest.
-                chosen = best_overflow_j
+            if chosen is None:
+                # Sort shelters by flood-weighted distance and score every
+                # fill ratio in one array op
+                order = np.argsort(self.dist_matrix[i])
+                ratio = (np.asarray(assigned_counts)[order] + pop) / np.maximum(1.0, self._caps[order])
+
+                # If there's physical space, take the nearest such shelter
+                free = np.flatnonzero(ratio <= 1.0)
+                if free.size:
+                    chosen = int(order[free[0]])
+                else:
+                    # All shelters are over capacity.
+                    # Pick the one with the smallest overflow ratio instead of the absolute nearest.
+                    chosen = int(order[np.argmin(ratio)])
 
             assigned_counts[chosen] += pop
             chromosome.append(chosen)
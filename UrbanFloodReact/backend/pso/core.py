@@ -53,10 +53,15 @@ class PSOEvacuationPlanner(BaseEvacuationPlanner):
                  c2: float        = 2.0,
                  v_max: float     = 4.0,
                  use_tomtom_traffic: bool = False,
+                 shared_setup=None,
+                 node_index=None,
+                 seed=None,
                  **kwargs):
 
         super().__init__(at_risk_nodes, safe_shelters, G,
-                         use_tomtom_traffic=use_tomtom_traffic)
+                         use_tomtom_traffic=use_tomtom_traffic,
+                         shared_setup=shared_setup, node_index=node_index,
+                         seed=seed)
 
         self.n_particles = n_particles
         self.iterations  = iterations
@@ -65,24 +70,27 @@ class PSOEvacuationPlanner(BaseEvacuationPlanner):
         self.c2          = c2
         self.v_max       = v_max
 
-        # Pre-compute nearest-shelter lookup for mutation fallback
-        # nearest_shelter[i] = shelter index closest to at-risk node i
-        self._nearest_shelter = np.argmin(self.dist_matrix, axis=1).astype(np.int32)
+        # 3 nearest shelters per node (cached partial sort) for particle
+        # perturbation; column 0 is each node's nearest shelter
+        self._nearest3 = self._nearest_shelters(3)
+        self._nearest_shelter = self._nearest3[:, 0].astype(np.int32)
 
     # ─────────────────────────────────────────────────────────────────────────
     # Helpers
     # ─────────────────────────────────────────────────────────────────────────
 
-    def _init_particle(self, n_risk: int) -> np.ndarray:
-        """Greedy chromosome ± 15% random perturbation → numpy int array."""
-        chrom = np.array(self._greedy_chromosome, dtype=np.int32)
-        mask  = np.random.random(n_risk) < 0.15
-        if mask.any():
-            # For perturbed genes, pick from the nearest 3 shelters
-            for i in np.where(mask)[0]:
-                nearest3   = np.argsort(self.dist_matrix[i])[:3]
-                chrom[i]   = int(np.random.choice(nearest3))
-        return chrom
+    def _init_swarm(self, n_risk: int) -> np.ndarray:
+        """
+        Greedy chromosome ± 15% random perturbation for every particle at
+        once → (n_particles, n_risk) numpy int array.
+        """
+        swarm = np.tile(np.asarray(self._greedy_chromosome, dtype=np.int32), (self.n_particles, 1))
+        # One mask draw for the whole swarm; perturbed genes pick from the
+        # nearest 3 shelters (cached table lookup, one draw for all of them)
+        rows, genes = np.nonzero(self._rng.random(swarm.shape) < 0.15)
+        picks = self._rng.integers(0, self._nearest3.shape[1], size=genes.size)
+        swarm[rows, genes] = self._nearest3[genes, picks]
+        return swarm
 
     @staticmethod
     def _sigmoid_arr(v: np.ndarray) -> np.ndarray:
@@ -102,14 +110,12 @@ class PSOEvacuationPlanner(BaseEvacuationPlanner):
         n_shelters = len(self.safe_shelters)
 
         # ── Initialise swarm ── (n_particles × n_risk NumPy arrays) ──────────
-        positions  = np.stack([self._init_particle(n_risk)
-                                for _ in range(self.n_particles)])           # (P, R)
-        velocities = np.random.uniform(-1.0, 1.0,
+        positions  = self._init_swarm(n_risk)                               # (P, R)
+        velocities = self._rng.uniform(-1.0, 1.0,
                                         size=(self.n_particles, n_risk))     # (P, R)
 
         pbest         = positions.copy()
-        pbest_fitness = np.array([self._fitness(p.tolist()) for p in pbest],
-                                  dtype=np.float64)
+        pbest_fitness = self._fitness_batch(pbest)
 
         gbest_idx     = int(np.argmin(pbest_fitness))
         gbest         = pbest[gbest_idx].copy()
@@ -122,8 +128,8 @@ class PSOEvacuationPlanner(BaseEvacuationPlanner):
 
         for iteration in range(self.iterations):
             # ── Vectorised velocity update ────────────────────────────────────
-            r1 = np.random.random((self.n_particles, n_risk))
-            r2 = np.random.random((self.n_particles, n_risk))
+            r1 = self._rng.random((self.n_particles, n_risk))
+            r2 = self._rng.random((self.n_particles, n_risk))
 
             velocities = (self.w  * velocities
                           + self.c1 * r1 * (pbest      - positions)   # (P, R)
@@ -133,11 +139,11 @@ class PSOEvacuationPlanner(BaseEvacuationPlanner):
 
             # ── Vectorised position update ────────────────────────────────────
             # Decide which genes update (sigmoid probability)
-            update_mask = np.random.random((self.n_particles, n_risk)) \
+            update_mask = self._rng.random((self.n_particles, n_risk)) \
                           < self._sigmoid_arr(velocities)               # (P, R) bool
 
             # For updated genes: randomly pull toward pbest or gbest
-            pull_pbest = np.random.random((self.n_particles, n_risk)) < p_pbest
+            pull_pbest = self._rng.random((self.n_particles, n_risk)) < p_pbest
 
             new_positions = positions.copy()
             # Pull toward pbest
@@ -153,15 +159,15 @@ class PSOEvacuationPlanner(BaseEvacuationPlanner):
 
             positions = new_positions
 
-            # ── Fitness evaluation ────────────────────────────────────────────
-            for p_idx in range(self.n_particles):
-                fit = self._fitness(positions[p_idx].tolist())
-                if fit < pbest_fitness[p_idx]:
-                    pbest[p_idx]         = positions[p_idx].copy()
-                    pbest_fitness[p_idx] = fit
-                    if fit < gbest_fitness:
-                        gbest         = positions[p_idx].copy()
-                        gbest_fitness = fit
+            # ── Fitness evaluation (whole swarm in one batch) ─────────────────
+            fits = self._fitness_batch(positions)
+            improved = fits < pbest_fitness
+            pbest[improved]         = positions[improved]
+            pbest_fitness[improved] = fits[improved]
+            best_idx = int(np.argmin(fits))
+            if fits[best_idx] < gbest_fitness:
+                gbest         = positions[best_idx].copy()
+                gbest_fitness = float(fits[best_idx])
 
             if (iteration + 1) % 10 == 0:
                 print(f"  [PSO] iter {iteration+1}/{self.iterations} "
@@ -7,12 +7,15 @@ between the API (Controller) and the Data/Simulators (Model).
 
 import asyncio
 import json
+import logging
 import time as _time_module
 from datetime import datetime
 import pandas as pd
 import osmnx as ox
 from fastapi import HTTPException
 
+logger = logging.getLogger(__name__)
+
 def _ts() -> str:
     """Return a short HH:MM:SS timestamp for debug logs."""
     return datetime.now().strftime('[%H:%M:%S]')
@@ -188,41 +191,42 @@ async def run_simulation_generator(hobli: str, rainfall_mm: float, steps: int, d
     final_flood_geojson = (
         json.loads(final_flood_gdf.to_json()) if not final_flood_gdf.empty else None
     )
-    print(f"{_ts()}  [DEBUG] final flood features = {len(final_flood_geojson['features']) if final_flood_geojson else 0}")
+    logger.debug("final flood features = %d", len(final_flood_geojson['features']) if final_flood_geojson else 0)
 
     # Filter shelters: prefer safe ones; fall back to all if all are flooded
     shelters_with_safety = filter_safe_shelters(all_shelters, final_flood_geojson, None)
     safe_shelters = [s for s in shelters_with_safety if s["safe"]]
     safe_count = len(safe_shelters)
-    print(f"{_ts()}  [DEBUG] safe shelters after filter = {safe_count} / {len(shelters_with_safety)}")
+    logger.debug("safe shelters after filter = %d / %d", safe_count, len(shelters_with_safety))
     for s in shelters_with_safety[:5]:
-        print(f"{_ts()}    shelter: {s['name']} | safe={s['safe']} | cap={s['capacity']} | node_id={s.get('node_id')}")
+        logger.debug("  shelter: %s | safe=%s | cap=%s | node_id=%s", s['name'], s['safe'], s['capacity'], s.get('node_id'))
 
     if not safe_shelters:
         # All shelters are in flood zone — use all of them (least-bad choice)
-        print(f"{_ts()}  [DEBUG] WARNING: all shelters flooded — using all candidates as fallback")
+        logger.warning("all shelters flooded — using all candidates as fallback")
         safe_shelters = shelters_with_safety if shelters_with_safety else all_shelters
 
     at_risk = sim.get_at_risk_nodes()
-    print(f"{_ts()}  [DEBUG] at_risk nodes = {len(at_risk)}")
+    logger.debug("at_risk nodes = %d", len(at_risk))
 
-    # Diagnostic: check sample depths and populations
-    sample_nodes = list(sim.G.nodes())[:5]
-    node_depths_sample = {n: round(sim.G.nodes[n].get('water_depth', 0), 3) for n in sample_nodes}
-    pop_sample = {n: sim.node_populations.get(n, 0) for n in sample_nodes}
-    print(f"{_ts()}  [DEBUG] sample node depths: {node_depths_sample}")
-    print(f"{_ts()}  [DEBUG] sample node pops:   {pop_sample}")
-    print(f"{_ts()}  [DEBUG] total_pop distributed: {sum(sim.node_populations.values())}")
+    # Diagnostic: check sample depths and populations (only built when DEBUG is on)
+    if logger.isEnabledFor(logging.DEBUG):
+        sample_nodes = list(sim.G.nodes())[:5]
+        node_depths_sample = {n: round(sim.G.nodes[n].get('water_depth', 0), 3) for n in sample_nodes}
+        pop_sample = {n: sim.node_populations.get(n, 0) for n in sample_nodes}
+        logger.debug("sample node depths: %s", node_depths_sample)
+        logger.debug("sample node pops:   %s", pop_sample)
+        logger.debug("total_pop distributed: %d", sum(sim.node_populations.values()))
 
     if not at_risk:
-        print(f"{_ts()}  [DEBUG] WARNING: at_risk is empty — lowering depth threshold to 0.05m for retry")
+        logger.warning("at_risk is empty — lowering depth threshold to 0.05m for retry")
         # Retry with a lower threshold — maybe flood didn't propagate deeply enough
         at_risk = sim.get_at_risk_nodes(depth_threshold_m=0.05)
-        print(f"{_ts()}  [DEBUG] at_risk (0.05m threshold) = {len(at_risk)}")
+        logger.debug("at_risk (0.05m threshold) = %d", len(at_risk))
 
     # Track total at-risk population BEFORE GA runs (for accurate remaining count)
     total_at_risk_before_ga = sum(pop for _, pop in at_risk)
-    print(f"{_ts()}  [DEBUG] total at-risk pop before GA = {total_at_risk_before_ga}")
+    logger.debug("total at-risk pop before GA = %s", total_at_risk_before_ga)
 
     planner_instance = None  # sentinel for traffic geojson extraction
     if at_risk and safe_shelters:
@@ -254,6 +258,7 @@ async def run_simulation_generator(hobli: str, rainfall_mm: float, steps: int, d
                     n_ants=pop_sz, iterations=gens,
                     n_particles=pop_sz,
                     use_tomtom_traffic=use_traffic,
+                    node_index=sim.node_index,
                 )
                 routes = instance.run()
                 return instance, routes
@@ -267,7 +272,7 @@ async def run_simulation_generator(hobli: str, rainfall_mm: float, steps: int, d
 
         except Exception as e:
             import traceback
-            print(f"{_ts()}  [DEBUG] *** {algo_label} EXCEPTION: {e} ***")
+            print(f"{_ts()}  *** {algo_label} EXCEPTION: {e} ***")
             traceback.print_exc()
             ga_execution_time = round(time.time() - ga_start, 2)
 
@@ -277,9 +282,9 @@ async def run_simulation_generator(hobli: str, rainfall_mm: float, steps: int, d
                 sim.shelter_occupancy.get(move["to_shelter"], 0) + move["pop"]
             )
             sim.total_evacuated += move["pop"]
-        print(f"{_ts()}  [DEBUG] total_evacuated = {sim.total_evacuated}")
+        logger.debug("total_evacuated = %s", sim.total_evacuated)
     else:
-        print(f"{_ts()}  [DEBUG] *** BLOCKED: at_risk and/or safe_shelters is empty — {algo_label} skipped ***")
+        logger.warning("BLOCKED: at_risk and/or safe_shelters is empty — %s skipped", algo_label)
     print(f"{_ts()} {'='*56}\n")
 
 
@@ -497,6 +502,7 @@ async def run_compare_generator(
                 pop_size=pop_sz, generations=gens,
                 use_tomtom_traffic=use_traffic,   # ← traffic fetched HERE (once)
                 shared_setup=None,
+                node_index=sim.node_index,
             )
             print(f"{_ts()}  [GA] init done (traffic+Dijkstra) in {round(time.time()-t0,2)}s")
             return instance
@@ -550,16 +556,18 @@ async def run_compare_generator(
                 return "ga", [], 0.0, round(time.time() - t0, 2), None
 
         print(f"{_ts()}  [compare] Launching GA (evolution) + ACO + PSO in parallel threads")
+        # Awaited on the event loop rather than blocking on fut.result(), so
+        # other requests and SSE streams keep being served while planners run
         with concurrent.futures.ThreadPoolExecutor(max_workers=3) as pool:
-            futures = [
-                pool.submit(_run_ga),                            # GA — pre-inited, runs evolution
-                pool.submit(_run_planner, "aco", ga_instance),  # ACO — reuses GA matrices
-                pool.submit(_run_planner, "pso", ga_instance),  # PSO — reuses GA matrices
-            ]
-            planner_results = {}
-            for fut in concurrent.futures.as_completed(futures):
-                algo_key, plan, fitness, elapsed, instance = fut.result()
-                planner_results[algo_key] = (plan, fitness, elapsed, instance)
+            finished = await asyncio.gather(
+                loop.run_in_executor(pool, _run_ga),                           # GA — pre-inited, runs evolution
+                loop.run_in_executor(pool, _run_planner, "aco", ga_instance),  # ACO — reuses GA matrices
+                loop.run_in_executor(pool, _run_planner, "pso", ga_instance),  # PSO — reuses GA matrices
+            )
+        planner_results = {
+            algo_key: (plan, fitness, elapsed, instance)
+            for algo_key, plan, fitness, elapsed, instance in finished
+        }
 
         total_compare_time = round(time.time() - compare_start, 2)
         print(f"{_ts()}  [compare] All planners finished in {total_compare_time}s total")
@@ -1,4 +1,5 @@
 import time
+import threading
 import requests
 import concurrent.futures
 from datetime import datetime
@@ -10,6 +11,21 @@ def _ts() -> str:
 # Constants
 TOMTOM_FLOW_API_URL = "https://api.tomtom.com/traffic/services/4/flowSegmentData/absolute/10/json"
 MAX_CONCURRENT_REQUESTS = 10  # Prevent hitting rate limits aggressively
+TRAFFIC_CACHE_TTL_S = 300     # Flow data is reused for 5 minutes across runs
+
+# (round(lat, 6), round(lon, 6)) -> (fetched_at, result); shared by all worker threads
+_traffic_cache: Dict[Tuple[float, float], Tuple[float, Dict]] = {}
+_cache_lock = threading.Lock()
+# One keep-alive HTTP session per worker thread (requests.Session is not thread-safe)
+_local = threading.local()
+
+def _session() -> requests.Session:
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+def _cache_key(coord: Tuple[float, float]) -> Tuple[float, float]:
+    return (round(coord[0], 6), round(coord[1], 6))
 
 def fetch_traffic_for_segment(api_key: str, coord: Tuple[float, float]) -> Optional[Dict]:
     """
@@ -27,7 +43,7 @@ def fetch_traffic_for_segment(api_key: str, coord: Tuple[float, float]) -> Optio
     }
     
     try:
-        response = requests.get(TOMTOM_FLOW_API_URL, params=params, timeout=10)
+        response = _session().get(TOMTOM_FLOW_API_URL, params=params, timeout=10)
         if response.status_code == 200:
             data = response.json()
             flow_data = data.get("flowSegmentData", {})
@@ -62,6 +78,9 @@ def get_bulk_traffic_data(api_key: str, coords: List[Tuple[float, float]]) -> Li
     """
     Synchronous wrapper to fetch traffic data for multiple coordinates using parallel workers.
     coords: List of (lat, lon) tuples representing midpoints of road segments.
+    Repeated coordinates (both directions of a two-way road share a midpoint)
+    are requested once, and results younger than TRAFFIC_CACHE_TTL_S are
+    served from memory instead of the API.
     """
     if not api_key:
          print(f"{_ts()}  [TomTom] API key not provided.")
@@ -70,23 +89,43 @@ def get_bulk_traffic_data(api_key: str, coords: List[Tuple[float, float]]) -> Li
     if not coords:
         return []
 
-    print(f"{_ts()}  [TomTom] Fetching traffic for {len(coords)} segments via ThreadPoolExecutor...")
     start_time = time.time()
-    
+
     results = []
-    
+    to_fetch = []
+    with _cache_lock:
+        # Drop expired entries so a long-running backend only keeps the last
+        # TRAFFIC_CACHE_TTL_S worth of coordinates
+        expired = [k for k, (fetched_at, _) in _traffic_cache.items()
+                   if start_time - fetched_at >= TRAFFIC_CACHE_TTL_S]
+        for key in expired:
+            del _traffic_cache[key]
+        for key in dict.fromkeys(_cache_key(c) for c in coords):
+            hit = _traffic_cache.get(key)
+            if hit is not None:
+                results.append(hit[1])
+            else:
+                to_fetch.append(key)
+
+    n_segments = len(to_fetch) + len(results)
+    print(f"{_ts()}  [TomTom] Fetching traffic for {len(to_fetch)} segments via ThreadPoolExecutor "
+          f"({len(results)} cached)...")
+
     # We use ThreadPoolExecutor to run multiple HTTP requests concurrently
     with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
         # Submit all tasks to the thread pool
-        futures = {executor.submit(fetch_traffic_for_segment, api_key, coord): coord for coord in coords}
+        futures = {executor.submit(fetch_traffic_for_segment, api_key, coord): coord for coord in to_fetch}
         
         # As they complete, add them to our results array
         for future in concurrent.futures.as_completed(futures):
             res = future.result()
             if res is not None:
                 results.append(res)
-    
+                # Failures (rate limits, timeouts) are not cached, so they retry next run
+                with _cache_lock:
+                    _traffic_cache[futures[future]] = (start_time, res)
+
     elapsed = round(time.time() - start_time, 2)
-    print(f"{_ts()}  [TomTom] 🚥 Fetched successfully: {len(results)}/{len(coords)} segments in {elapsed}s.")
+    print(f"{_ts()}  [TomTom] 🚥 Fetched successfully: {len(results)}/{n_segments} segments in {elapsed}s.")
     
     return results
@@ -5,10 +5,29 @@ Handles login, user roles, and session management
 
 import streamlit as st
 import hashlib
+import hmac
 import os
+import time
 from datetime import datetime, timedelta
+from pymongo.errors import BulkWriteError, OperationFailure
 from db_utils import get_users_collection, save_user
 
+# Short-lived in-process cache of user documents so repeated lookups
+# (login, registration checks) skip the MongoDB round-trip.
+# username -> (expires_at, user_doc)
+USER_CACHE_TTL = 30  # seconds
+_user_cache = {}
+
+# The username index only needs creating once per process, not on every
+# Streamlit rerun that builds an AuthManager
+_username_index_ready = False
+
+# scrypt KDF parameters (~16 MiB, tens of ms per hash). Stored hashes look like
+# "scrypt$n$r$p$salt_hex$key_hex"; bare 64-char hex strings are legacy SHA-256.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
 class AuthManager:
     def __init__(self):
         self.session_timeout = 30  # minutes
@@ -16,8 +35,17 @@ class AuthManager:
     
     def init_default_users(self):
         """Initialize default users in MongoDB if collection is empty"""
+        global _username_index_ready
         users_col = get_users_collection()
-        if users_col.count_documents({}) == 0:
+        if not _username_index_ready:
+            try:
+                # Every login/registration looks users up by username
+                users_col.create_index("username", unique=True)
+            except OperationFailure as e:
+                print(f"Could not create username index: {e}")
+            _username_index_ready = True
+        # Only need to know whether any user exists, not how many
+        if users_col.count_documents({}, limit=1) == 0:
             default_users = [
                 {
                     "username": "admin",
@@ -47,12 +75,45 @@ class AuthManager:
                     "created": datetime.now().isoformat()
                 }
             ]
-            users_col.insert_many(default_users)
+            try:
+                # One bulk round-trip; unordered so a concurrent seeder's
+                # duplicates (rejected by the unique index) don't stop the rest
+                users_col.insert_many(default_users, ordered=False)
+            except BulkWriteError:
+                pass
     
     def hash_password(self, password):
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password with a salted scrypt KDF"""
+        salt = os.urandom(16)
+        key = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${key.hex()}"
+
+    def verify_password(self, stored, password):
+        """Check a password against a stored scrypt or legacy SHA-256 hash"""
+        if stored.startswith("scrypt$"):
+            _, n, r, p, salt, key = stored.split("$")
+            candidate = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p))
+            return hmac.compare_digest(candidate.hex(), key)
+        # Legacy unsalted SHA-256 hex digest
+        return hmac.compare_digest(stored, hashlib.sha256(password.encode()).hexdigest())
+
+    def needs_rehash(self, stored):
+        """True for hashes not produced with the current scrypt parameters"""
+        return not stored.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
     
+    def _find_user(self, username):
+        """Fetch a user document, served from the TTL cache when fresh"""
+        cached = _user_cache.get(username)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        user = get_users_collection().find_one({"username": username})
+        if user:
+            # Only hits are cached so a newly registered user is seen immediately
+            _user_cache[username] = (time.monotonic() + USER_CACHE_TTL, user)
+        else:
+            _user_cache.pop(username, None)
+        return user
+
     def load_users(self):
         """Load all users from MongoDB as a dict keyed by username"""
         users_col = get_users_collection()
@@ -61,18 +122,19 @@ class AuthManager:
     
     def authenticate(self, username, password):
         """Authenticate user credentials using MongoDB"""
-        users_col = get_users_collection()
-        user = users_col.find_one({"username": username})
-        if user:
-            hashed_password = self.hash_password(password)
-            if user["password"] == hashed_password:
-                return user
+        user = self._find_user(username)
+        if user and self.verify_password(user["password"], password):
+            if self.needs_rehash(user["password"]):
+                # Upgrade legacy SHA-256 hashes transparently on successful login
+                new_hash = self.hash_password(password)
+                get_users_collection().update_one({"username": username}, {"$set": {"password": new_hash}})
+                user["password"] = new_hash
+            return user
         return None
     
     def register_user(self, username, password, role, name, email, phone):
         """Register new user with email and phone in MongoDB"""
-        users_col = get_users_collection()
-        if users_col.find_one({"username": username}):
+        if self._find_user(username):
             return False, "Username already exists"
         user = {
             "username": username,
@@ -83,7 +145,9 @@ class AuthManager:
             "phone": phone,
             "created": datetime.now().isoformat()
         }
+        users_col = get_users_collection()
         users_col.insert_one(user)
+        _user_cache.pop(username, None)
         return True, "User registered successfully"
     
     def update_user_email_phone(self, username, email, phone):
@@ -93,6 +157,7 @@ class AuthManager:
             {"username": username},
             {"$set": {"email": email, "phone": phone}}
         )
+        _user_cache.pop(username, None)
         return result.modified_count > 0
 
 def show_login_page():
@@ -198,6 +263,8 @@ def show_login_page():
                     st.warning("⚠️ Please fill in all fields")
 
     with demo_tab:
+        # Demo buttons set the session directly and never call authenticate(),
+        # so they cost no KDF work and can't be used to load the hasher
         st.subheader("Demo Accounts")
         st.info("Use these demo accounts to explore the system:")
         
@@ -1,10 +1,14 @@
 # db_utils.py
 from pymongo import MongoClient
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 load_dotenv()  
 
+@lru_cache(maxsize=None)
 def get_mongo_client():
+    # MongoClient is thread-safe and pools connections; share one per process
+    # instead of reconnecting on every collection lookup
     mongo_uri = os.getenv("MONGO_URI")
     return MongoClient(mongo_uri)
 
@@ -11,6 +11,7 @@ from shapely.geometry import Point
 from haversine import haversine
 import logging
 from collections import deque, defaultdict
+from network_utils import nearest_center_routes, route_to_center
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -50,6 +51,16 @@ def find_nearest_node_robust(G, point, max_distance=1000):
             else:
                 raise Exception("No nodes in graph")
 
+def snap_safe_centers(G, safe_centers_gdf):
+    """Snap every safe center to the network once: [(center_idx, center_row, node), ...]"""
+    snapped = []
+    for center_idx, center_row in safe_centers_gdf.iterrows():
+        try:
+            snapped.append((center_idx, center_row, find_nearest_node_robust(G, center_row.geometry)))
+        except Exception:
+            continue
+    return snapped
+
 def generate_detailed_evacuation_log(evacuation_result, safe_centers_gdf, location_name, algorithm_name):
     """Generate comprehensive evacuation log with center-wise statistics"""
     
@@ -276,6 +287,13 @@ def dijkstra_evacuation(G, flooded_people, safe_centers_gdf, walking_speed_kmph=
     evacuated_people, evac_routes, evac_times, unreachable, evac_log = [], [], [], [], []
     start_time = time.time()
 
+    # "Supernode" search: every center is snapped once, then one multi-source
+    # Dijkstra over the reversed edges labels each node with its fastest
+    # center and the time to it, replacing a shortest_path call per
+    # (person, center) pair
+    center_at_node, center_times, next_hop = nearest_center_routes(
+        G, safe_centers_gdf, find_nearest_node_robust, evac_log)
+
     for idx, row in flooded_people.iterrows():
         person_id = row.get('person_id', idx)
         person_point = row.geometry
@@ -288,38 +306,11 @@ def dijkstra_evacuation(G, flooded_people, safe_centers_gdf, walking_speed_kmph=
             continue
 
         best_route, best_time, best_center_id = None, float('inf'), None
-
-        # Try each safe center
-        for _, center_row in safe_centers_gdf.iterrows():
-            dest_point = center_row.geometry
-            center_id = center_row.get('center_id', 'Unknown')
-
-            try:
-                dest_node = find_nearest_node_robust(G, dest_point)
-                path = nx.shortest_path(G, orig_node, dest_node, weight='travel_time')
-                
-                # Calculate total time
-                time_taken = 0
-                for i in range(len(path) - 1):
-                    u, v = path[i], path[i + 1]
-                    # Handle multiple edges between nodes
-                    edge_data = G[u][v]
-                    if isinstance(edge_data, dict) and 'travel_time' in edge_data:
-                        time_taken += edge_data['travel_time']
-                    else:
-                        # Multiple edges, take the first one with travel_time
-                        for key, data in edge_data.items():
-                            if 'travel_time' in data:
-                                time_taken += data['travel_time']
-                                break
-
-                if time_taken < best_time:
-                    best_route = path
-                    best_time = time_taken
-                    best_center_id = center_id
-            except Exception as e:
-                evac_log.append(f"No path found from Person {person_id} to {center_id}: {e}")
-                continue
+        if orig_node in center_times:
+            # Only the routes of people actually being evacuated are rebuilt
+            best_route = route_to_center(next_hop, orig_node)
+            best_time = center_times[orig_node]
+            best_center_id = center_at_node[best_route[-1]]
 
         if best_route:
             evac_routes.append({
@@ -396,6 +387,9 @@ def astar_evacuation(G, flooded_people, safe_centers_gdf, walking_speed_kmph=5):
         except:
             return 0
 
+    # Centers are snapped once, not once per person
+    centers = snap_safe_centers(G, safe_centers_gdf)
+
     for i, row in flooded_people.iterrows():
         person_id = row.get('person_id', i)
         person = row.geometry
@@ -411,9 +405,8 @@ def astar_evacuation(G, flooded_people, safe_centers_gdf, walking_speed_kmph=5):
         best_route = None
         best_center_id = None
 
-        for idx, center_row in safe_centers_gdf.iterrows():
+        for idx, center_row, dest_node in centers:
             try:
-                dest_node = find_nearest_node_robust(G, center_row.geometry)
                 path = nx.astar_path(G, orig_node, dest_node,
                                    heuristic=euclidean_heuristic,
                                    weight='travel_time')
@@ -548,6 +541,9 @@ def quanta_adaptive_routing_evacuation(G, flooded_people, safe_centers_gdf, walk
         # Add random penalty for simulation
         data['penalty'] = np.random.uniform(0, 0.5)
 
+    # Centers are snapped once, not once per person
+    centers = snap_safe_centers(G, safe_centers_gdf)
+
     for idx, person_row in flooded_people.iterrows():
         person_id = person_row.get('person_id', idx)
         person_point = person_row.geometry
@@ -564,9 +560,8 @@ def quanta_adaptive_routing_evacuation(G, flooded_people, safe_centers_gdf, walk
         best_cost = float('inf')
         best_center = None
 
-        for center_idx, center_row in safe_centers_gdf.iterrows():
+        for center_idx, center_row, center_node in centers:
             try:
-                center_node = find_nearest_node_robust(G, center_row.geometry)
                 center_id = center_row.get('center_id', f'Center_{center_idx}')
                 
                 path, cost = quanta_adaptive_routing(G, origin_node, center_node)
@@ -643,6 +638,9 @@ def bidirectional_evacuation(G, flooded_people, safe_centers_gdf, walking_speed_
         if 'length' in data:
             data['travel_time'] = data['length'] / walking_speed_mpm
 
+    # Centers are snapped once, not once per person
+    centers = snap_safe_centers(G, safe_centers_gdf)
+
     for person_idx, person_row in flooded_people.iterrows():
         person_point = person_row.geometry
         person_id = person_row.get('person_id', person_idx)
@@ -659,9 +657,8 @@ def bidirectional_evacuation(G, flooded_people, safe_centers_gdf, walking_speed_
         shortest_cost = float('inf')
         chosen_center = None
 
-        for center_idx, center_row in safe_centers_gdf.iterrows():
+        for center_idx, center_row, target_node in centers:
             try:
-                target_node = find_nearest_node_robust(G, center_row.geometry)
                 center_id = center_row.get('center_id', f'Center_{center_idx}')
                 
                 if source_node == target_node:
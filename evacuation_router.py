@@ -3,6 +3,7 @@ import osmnx as ox
 import time
 import geopandas as gpd
 from shapely.geometry import Point, LineString
+from network_utils import nearest_center_routes, route_to_center
 
 def prepare_safe_centers(hospitals_gdf, police_gdf, edges, flood_poly):
     """
@@ -90,6 +91,12 @@ def evacuate_people_with_shortest_path(G, flooded_people, safe_centers_gdf, walk
             'execution_time': time.time() - start_time
         }
 
+    # Every center is snapped once, then one multi-source Dijkstra over the
+    # reversed edges labels each node with its fastest center and the time
+    # to it, replacing a shortest_path call per (person, center) pair
+    center_at_node, center_times, next_hop = nearest_center_routes(
+        G, safe_centers_gdf, lambda G, point: ox.distance.nearest_nodes(G, point.x, point.y), evac_log)
+
     for idx, row in flooded_people.iterrows():
         person_id = row['person_id']
         person_point = row.geometry
@@ -102,38 +109,11 @@ def evacuate_people_with_shortest_path(G, flooded_people, safe_centers_gdf, walk
             continue
 
         best_route, best_time, best_center_id = None, float('inf'), None
-
-        # Try each safe center
-        for _, center_row in safe_centers_gdf.iterrows():
-            dest_point = center_row.geometry
-            center_id = center_row.center_id
-
-            try:
-                dest_node = ox.distance.nearest_nodes(G, dest_point.x, dest_point.y)
-                path = nx.shortest_path(G, orig_node, dest_node, weight='travel_time')
-                
-                # Calculate total time
-                time_taken = 0
-                for i in range(len(path) - 1):
-                    u, v = path[i], path[i + 1]
-                    # Handle multiple edges between nodes
-                    edge_data = G[u][v]
-                    if isinstance(edge_data, dict) and 'travel_time' in edge_data:
-                        time_taken += edge_data['travel_time']
-                    else:
-                        # Multiple edges, take the first one with travel_time
-                        for key, data in edge_data.items():
-                            if 'travel_time' in data:
-                                time_taken += data['travel_time']
-                                break
-
-                if time_taken < best_time:
-                    best_route = path
-                    best_time = time_taken
-                    best_center_id = center_id
-            except Exception as e:
-                evac_log.append(f"No path found from Person {person_id} to {center_id}: {e}")
-                continue
+        if orig_node in center_times:
+            # Only the routes of people actually being evacuated are rebuilt
+            best_route = route_to_center(next_hop, orig_node)
+            best_time = center_times[orig_node]
+            best_center_id = center_at_node[best_route[-1]]
 
         if best_route:
             evac_routes.append({
@@ -1,7 +1,8 @@
 import numpy as np
 import geopandas as gpd
-import random
-from shapely.geometry import Point, LineString
+import shapely
+from shapely.geometry import Point
+from shapely.strtree import STRtree
 import matplotlib.cm as cm
 from matplotlib.colors import to_hex
 import osmnx as ox
@@ -14,21 +15,22 @@ def create_elevation_grid(edges, resolution=100):
     y = np.linspace(ymin, ymax, resolution)
     xx, yy = np.meshgrid(x, y)
     
-    elevation = np.zeros(xx.shape)
-    for i in range(xx.shape[0]):
-        for j in range(xx.shape[1]):
-            dist_from_west = (xx[i, j] - xmin) / (xmax - xmin)
-            base_ele = 2 + 25 * dist_from_west
-            variation = np.sin(xx[i, j] * 0.0001) * np.cos(yy[i, j] * 0.0001) * 4
-            elevation[i, j] = max(0, base_ele + variation)
-    
-    points = [Point(xx[i, j], yy[i, j]) for i in range(xx.shape[0]) for j in range(xx.shape[1])]
-    elev_vals = [elevation[i, j] for i in range(xx.shape[0]) for j in range(xx.shape[1])]
-    elev_gdf = gpd.GeoDataFrame({'elevation': elev_vals}, geometry=points, crs=edges.crs)
+    # Whole-grid array arithmetic: west-to-east slope plus a smooth ripple
+    dist_from_west = (xx - xmin) / (xmax - xmin)
+    base_ele = 2 + 25 * dist_from_west
+    variation = np.sin(xx * 0.0001) * np.cos(yy * 0.0001) * 4
+    elevation = np.maximum(0, base_ele + variation)
+
+    # One vectorised constructor call for every grid point (row-major order)
+    points = shapely.points(xx.ravel(), yy.ravel())
+    elev_gdf = gpd.GeoDataFrame({'elevation': elevation.ravel()}, geometry=points, crs=edges.crs)
     
     return elev_gdf
 
 class DynamicFloodSimulator:
+    # Metric CRS used for the flood ring radii
+    PROJECTED_CRS = "EPSG:3857"
+
     def __init__(self, elev_gdf, edges, nodes, station, lat, lon, initial_people=50):
         self.elev_gdf = elev_gdf
         self.edges = edges
@@ -38,179 +40,196 @@ class DynamicFloodSimulator:
         self.lon = lon
         self.road_lines = edges.geometry.tolist()
 
+        # Static edge properties, materialised once instead of per people/flood update
+        if hasattr(edges, 'total_bounds'):
+            self._bounds = tuple(edges.total_bounds)
+        else:
+            buffer = 0.005  # Smaller buffer for better accuracy
+            self._bounds = (lon - buffer, lat - buffer, lon + buffer, lat + buffer)
+        self._crs = edges.crs
+        geoms = np.asarray(edges.geometry.values)
+        self._road_segments = geoms[(shapely.get_type_id(geoms) == 1) & (shapely.length(geoms) > 0)]
+
+        # Edges never move, so project them once for the radial flood tests
+        self._edges_proj = edges.geometry.to_crs(self.PROJECTED_CRS).values
+        # R-tree over the projected edges so flood checks only touch nearby roads
+        self._edge_tree = STRtree(self._edges_proj)
+
         # Elevation ranges
         self.min_elevation = elev_gdf['elevation'].min()
         self.max_elevation = elev_gdf['elevation'].max()
 
-        # People
-        self.people_gdf = self._generate_people(initial_people)
-        self.current_people_count = initial_people
+        # People: coordinates live in preallocated buffers so count changes
+        # only generate/copy the people being added
+        self._capacity = max(initial_people * 2, 128)
+        self._xs = np.empty(self._capacity)
+        self._ys = np.empty(self._capacity)
+        self.current_people_count = 0
+        self._append_people(self._generate_people(initial_people))
 
     def _generate_people(self, num_people):
         """Generate people randomly along road network with improved positioning"""
-        people_points = []
-        attempts = 0
-        max_attempts = num_people * 50  # Increase attempts significantly
-
-        # Get bounds from edges
-        if hasattr(self.edges, 'total_bounds'):
-            bounds = self.edges.total_bounds
-            xmin, ymin, xmax, ymax = bounds
-        else:
-            buffer = 0.005  # Smaller buffer for better accuracy
-            xmin, ymin = self.lon - buffer, self.lat - buffer
-            xmax, ymax = self.lon + buffer, self.lat + buffer
+        rng = np.random.default_rng()
+        xs, ys = [], []
+        placed = 0
+
+        xmin, ymin, xmax, ymax = self._bounds
+
+        def in_bounds(px, py):
+            return (xmin <= px) & (px <= xmax) & (ymin <= py) & (py <= ymax)
 
         # Strategy 1: Place people directly on road segments
-        road_segments = []
-        for idx, row in self.edges.iterrows():
-            if isinstance(row.geometry, LineString) and row.geometry.length > 0:
-                road_segments.append(row.geometry)
+        road_segments = self._road_segments
 
-        # Generate points along roads first
+        # Generate points along roads first: each sampled road yields a point
+        # at each of the five fractions, all interpolated in one batch
         target_on_roads = int(num_people * 0.8)  # 80% on roads
-        while len(people_points) < target_on_roads and attempts < max_attempts:
-            try:
-                if road_segments:
-                    road = random.choice(road_segments)
-                    # Sample multiple points along the road
-                    for fraction in [0.1, 0.3, 0.5, 0.7, 0.9]:
-                        if len(people_points) >= target_on_roads:
-                            break
-                        point = road.interpolate(fraction, normalized=True)
-                        if (xmin <= point.x <= xmax and ymin <= point.y <= ymax):
-                            people_points.append(point)
-                attempts += 1
-            except Exception as e:
-                attempts += 1
-                continue
+        if len(road_segments) and target_on_roads:
+            fractions = np.array([0.1, 0.3, 0.5, 0.7, 0.9])
+            n_roads = -(-target_on_roads // len(fractions))
+            roads = road_segments[rng.integers(len(road_segments), size=n_roads)]
+            pts = shapely.line_interpolate_point(
+                np.repeat(roads, len(fractions))[:target_on_roads],
+                np.tile(fractions, n_roads)[:target_on_roads],
+                normalized=True,
+            )
+            px, py = shapely.get_x(pts), shapely.get_y(pts)
+            keep = in_bounds(px, py)
+            xs.append(px[keep]); ys.append(py[keep])
+            placed += int(keep.sum())
 
         # Strategy 2: Place remaining people near road intersections
-        if len(people_points) < num_people and hasattr(self, 'nodes'):
-            node_coords = [(data.get('x'), data.get('y')) for node, data in self.nodes.iterrows() 
-                          if data.get('x') is not None and data.get('y') is not None]
-            
-            while len(people_points) < num_people and node_coords:
-                try:
-                    x, y = random.choice(node_coords)
-                    # Add small random offset near intersection
-                    offset = 0.0001  # Very small offset
-                    x += random.uniform(-offset, offset)
-                    y += random.uniform(-offset, offset)
-                    point = Point(x, y)
-                    if (xmin <= point.x <= xmax and ymin <= point.y <= ymax):
-                        people_points.append(point)
-                except:
-                    continue
+        if placed < num_people and {'x', 'y'} <= set(self.nodes.columns):
+            node_coords = self.nodes[['x', 'y']].dropna().to_numpy(dtype=float)
+            offset = 0.0001  # Very small offset
+            for _ in range(10):  # Bounded redraws for offsets landing out of bounds
+                if placed >= num_people or not len(node_coords):
+                    break
+                need = num_people - placed
+                picks = node_coords[rng.integers(len(node_coords), size=need)]
+                px = picks[:, 0] + rng.uniform(-offset, offset, size=need)
+                py = picks[:, 1] + rng.uniform(-offset, offset, size=need)
+                keep = in_bounds(px, py)
+                xs.append(px[keep]); ys.append(py[keep])
+                placed += int(keep.sum())
 
         # Strategy 3: Fill remaining with grid-based placement near roads
-        while len(people_points) < num_people:
-            try:
-                # Create a grid and find points near roads
-                x = random.uniform(xmin, xmax)
-                y = random.uniform(ymin, ymax)
-                candidate_point = Point(x, y)
-                
-                # Check if point is reasonably close to any road
-                min_distance = float('inf')
-                for road in road_segments[:10]:  # Check first 10 roads for efficiency
-                    distance = candidate_point.distance(road)
-                    min_distance = min(min_distance, distance)
-                
-                # Accept point if it's within reasonable distance of a road
-                if min_distance < 0.001:  # Adjust threshold as needed
-                    people_points.append(candidate_point)
-                elif len(people_points) < num_people * 0.5:  # If we have very few points, be less strict
-                    people_points.append(candidate_point)
-                
-                if len(people_points) >= num_people:
-                    break
-                    
-            except Exception as e:
-                # Last resort: just place randomly
-                try:
-                    x = random.uniform(xmin, xmax)
-                    y = random.uniform(ymin, ymax)
-                    people_points.append(Point(x, y))
-                except:
+        if placed < num_people:
+            # Accept unconditionally while we have very few points, then only
+            # candidates reasonably close to a road (first 10 roads for efficiency)
+            lenient = max(0, int(np.ceil(num_people * 0.5)) - placed)
+            nearby_roads = shapely.multilinestrings(road_segments[:10]) if len(road_segments) else None
+            for _ in range(50):
+                need = num_people - placed
+                if need <= 0:
                     break
+                px = rng.uniform(xmin, xmax, size=need * 4)
+                py = rng.uniform(ymin, ymax, size=need * 4)
+                keep = np.zeros(len(px), dtype=bool)
+                keep[:lenient] = True
+                if nearby_roads is not None:
+                    keep |= shapely.distance(shapely.points(px, py), nearby_roads) < 0.001
+                lenient = 0
+                idx = np.flatnonzero(keep)[:need]
+                xs.append(px[idx]); ys.append(py[idx])
+                placed += len(idx)
 
         # Ensure we have the requested number of people
-        while len(people_points) < num_people:
-            try:
-                x = random.uniform(xmin, xmax)
-                y = random.uniform(ymin, ymax)
-                people_points.append(Point(x, y))
-            except:
-                break
+        if placed < num_people:
+            need = num_people - placed
+            xs.append(rng.uniform(xmin, xmax, size=need))
+            ys.append(rng.uniform(ymin, ymax, size=need))
+
+        xs = np.concatenate(xs)[:num_people] if xs else np.empty(0)
+        ys = np.concatenate(ys)[:num_people] if ys else np.empty(0)
+        people_points = shapely.points(xs, ys)
 
         print(f"Generated {len(people_points)} people (requested: {num_people})")
         
         return gpd.GeoDataFrame(
-            {'person_id': list(range(1, len(people_points) + 1))},
+            {'person_id': np.arange(1, len(people_points) + 1)},
             geometry=people_points,
-            crs=self.edges.crs
+            crs=self._crs
         )
 
     def _calculate_flood_impact(self, flood_fraction):
         """Calculate flood impact based on fraction (0-1) - ADVANCED CONCENTRIC RING MODEL"""
-        flood_gdf = gpd.GeoDataFrame(geometry=[], crs=self.edges.crs)
+        # Concentric ring logic for gradient flood effect
+        max_radius = 5000  # 5km
+        num_rings = 10
+        rings_to_fill = int(np.clip(flood_fraction, 0, 1) * num_rings)
+
+        # No ring filled (the usual first tick): skip projection and spatial tests
+        if rings_to_fill == 0:
+            return {
+                'flood_gdf': gpd.GeoDataFrame(geometry=[], crs=self._crs),
+                'flood_poly': None,
+                'flooded_people': gpd.GeoDataFrame(columns=self.people_gdf.columns, crs=self._crs),
+                'safe_people': self.people_gdf.copy(),
+                'blocked_edges': gpd.GeoDataFrame(columns=self.edges.columns, crs=self._crs)
+            }
 
         # Origin point from station coordinates
         origin_point = Point(self.lon, self.lat)
 
         # Project to metric CRS for buffer calculations
-        projected_crs = "EPSG:3857"
-        origin_gdf = gpd.GeoDataFrame(geometry=[origin_point], crs="EPSG:4326").to_crs(projected_crs)
+        projected_crs = self.PROJECTED_CRS
+        origin_proj = gpd.GeoSeries([origin_point], crs="EPSG:4326").to_crs(projected_crs).iloc[0]
 
-        # Concentric ring logic for gradient flood effect
-        max_radius = 5000  # 5km
-        num_rings = 10
-        rings_to_fill = int(np.clip(flood_fraction, 0, 1) * num_rings)
-
-        flood_geoms = []
-        colors = []
         cmap = cm.get_cmap('Blues', num_rings + 2)
 
-        for i in range(rings_to_fill):
-            inner_radius = (i / num_rings) * max_radius
-            outer_radius = ((i + 1) / num_rings) * max_radius
+        # Build every disc in one vectorised buffer call, derive all rings
+        # with one element-wise difference, and reproject them together
+        radii = (np.arange(rings_to_fill + 1) / num_rings) * max_radius
+        discs = shapely.buffer(origin_proj, radii, quad_segs=16)
+        rings = shapely.difference(discs[1:], discs[:-1])
 
-            outer = origin_gdf.buffer(outer_radius).geometry.iloc[0]
-            inner = origin_gdf.buffer(inner_radius).geometry.iloc[0]
-            ring = outer.difference(inner)
+        # The rings tile the outermost disc, so it stands in for their union
+        geoms = gpd.GeoSeries(np.append(rings, discs[-1]), crs=projected_crs).to_crs(self._crs)
+        flood_geoms, flood_poly = geoms.values[:-1], geoms.values[-1]
+        colors = [to_hex(cmap(num_rings - i)) for i in range(rings_to_fill)]  # darker near center
 
-            ring_gdf = gpd.GeoDataFrame(geometry=[ring], crs=projected_crs).to_crs(self.edges.crs)
-            flood_geoms.append(ring_gdf.geometry.iloc[0])
-            colors.append(to_hex(cmap(num_rings - i)))  # darker near center
+        flood_gdf = gpd.GeoDataFrame({'geometry': flood_geoms, 'color': colors}, crs=self._crs)
 
-        if flood_geoms:
-            flood_gdf = gpd.GeoDataFrame({'geometry': flood_geoms, 'color': colors}, crs=self.edges.crs)
-            flood_poly = flood_gdf.unary_union
-        else:
-            flood_gdf = gpd.GeoDataFrame(geometry=[], crs=self.edges.crs)
-            flood_poly = None
-
-        # Calculate impacts
-        if flood_poly is not None:
-            flooded_people = self.people_gdf[self.people_gdf.geometry.within(flood_poly)]
-            safe_people = self.people_gdf[~self.people_gdf.geometry.within(flood_poly)]
-            blocked_edges = self.edges[self.edges.geometry.intersects(flood_poly)]
-        else:
-            flooded_people = gpd.GeoDataFrame(columns=self.people_gdf.columns, crs=self.people_gdf.crs)
-            safe_people = self.people_gdf.copy()
-            blocked_edges = gpd.GeoDataFrame(columns=self.edges.columns, crs=self.edges.crs)
+        # Calculate impacts: the flooded area is a disc around the origin, so a
+        # metric distance check per person/edge replaces the polygon predicates
+        flood_radius = radii[-1]
+        people_proj = self.people_gdf.geometry.to_crs(projected_crs).values
+        in_flood = shapely.distance(people_proj, origin_proj) < flood_radius
+        hit = self._edge_tree.query(origin_proj, predicate="dwithin", distance=flood_radius)
 
         return {
             'flood_gdf': flood_gdf,
             'flood_poly': flood_poly,
-            'flooded_people': flooded_people,
-            'safe_people': safe_people,
-            'blocked_edges': blocked_edges
+            'flooded_people': self.people_gdf[in_flood],
+            'safe_people': self.people_gdf[~in_flood],
+            'blocked_edges': self.edges.iloc[np.sort(hit)]
         }
 
+    def _append_people(self, new_people):
+        """Copy freshly generated people into the buffers and rebuild people_gdf"""
+        start = self.current_people_count
+        end = start + len(new_people)
+        if end > self._capacity:
+            self._capacity = max(end, self._capacity * 2)
+            self._xs = np.resize(self._xs, self._capacity)
+            self._ys = np.resize(self._ys, self._capacity)
+        self._xs[start:end] = new_people.geometry.x.to_numpy()
+        self._ys[start:end] = new_people.geometry.y.to_numpy()
+        self._set_people_count(end)
+
+    def _set_people_count(self, count):
+        self.current_people_count = count
+        self.people_gdf = gpd.GeoDataFrame(
+            {'person_id': np.arange(1, count + 1)},
+            geometry=shapely.points(self._xs[:count], self._ys[:count]),
+            crs=self._crs
+        )
+
     def update_people_count(self, new_count):
         """Update the number of people in simulation"""
-        if new_count != self.current_people_count:
-            self.people_gdf = self._generate_people(new_count)
-            self.current_people_count = new_count
\ No newline at end of file
+        if new_count > self.current_people_count:
+            # Only the additional people are generated; existing ones keep their positions
+            self._append_people(self._generate_people(new_count - self.current_people_count))
+        elif new_count < self.current_people_count:
+            self._set_people_count(new_count)
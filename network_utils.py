@@ -5,6 +5,8 @@ import geopandas as gpd
 from shapely.geometry import Point, LineString
 import random
 import logging
+from heapq import heappush, heappop
+from itertools import count
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -228,6 +230,58 @@ def setup_graph_for_evacuation(G: nx.Graph, walking_speed_kmph: float = 5) -> nx
         logger.error(f"Failed to setup graph for evacuation: {str(e)}")
         return G
 
+def nearest_center_routes(G, safe_centers_gdf, snap, log, weight='travel_time'):
+    """
+    Snap each safe center to the network once with snap(G, point) (the first
+    center wins a shared node), then run one multi-source Dijkstra from every
+    center over the reversed edges. Each node is labelled with the cost to its
+    fastest center and the next hop towards it; only those predecessors are
+    kept, so a route is rebuilt (route_to_center) just for the nodes asked for.
+    Returns (center_at_node, dist, next_hop).
+    """
+    center_at_node = {}
+    for _, center_row in safe_centers_gdf.iterrows():
+        center_id = center_row.get('center_id', 'Unknown')
+        try:
+            dest_node = snap(G, center_row.geometry)
+        except Exception as e:
+            log.append(f"Safe center {center_id} could not be placed on the road network: {e}")
+            continue
+        center_at_node.setdefault(dest_node, center_id)
+
+    # Reversed search: for each node u, look at the edges u -> v leaving it
+    incoming = G.pred if G.is_directed() else G.adj
+    multigraph = G.is_multigraph()
+    dist, next_hop, seen = {}, {}, {}
+    heap, counter = [], count()
+    for node in center_at_node:
+        seen[node] = 0
+        next_hop[node] = None
+        heappush(heap, (0, next(counter), node))
+    while heap:
+        d, _, v = heappop(heap)
+        if v in dist:
+            continue
+        dist[v] = d
+        for u, data in incoming[v].items():
+            if multigraph:
+                cost = min(attr.get(weight, 1) for attr in data.values())
+            else:
+                cost = data.get(weight, 1)
+            uv_dist = d + cost
+            if u not in dist and (u not in seen or uv_dist < seen[u]):
+                seen[u] = uv_dist
+                next_hop[u] = v
+                heappush(heap, (uv_dist, next(counter), u))
+    return center_at_node, dist, next_hop
+
+def route_to_center(next_hop, node):
+    """Node list from `node` to its fastest center (see nearest_center_routes)"""
+    path = [node]
+    while next_hop[path[-1]] is not None:
+        path.append(next_hop[path[-1]])
+    return path
+
 def get_nearest_node_robust(G, point, max_distance=1000):
     """Enhanced nearest node finding with multiple fallback strategies"""
     try:
@@ -1,4 +1,5 @@
 
+import hashlib
 import pytest
 from datetime import datetime
 from auth_components import AuthManager
@@ -26,3 +27,26 @@ def test_authenticate_user(auth_manager):
 def test_update_user_email_phone(auth_manager):
     updated = auth_manager.update_user_email_phone("user5", "updated@example.com", "+911111111111")
     assert updated is True
+
+# Password hashing needs no database, so skip __init__ (which seeds MongoDB)
+@pytest.fixture
+def hasher():
+    return AuthManager.__new__(AuthManager)
+
+def test_scrypt_password_round_trip(hasher):
+    stored = hasher.hash_password("Test@1234")
+    assert stored.startswith("scrypt$")
+    assert hasher.verify_password(stored, "Test@1234")
+    assert not hasher.verify_password(stored, "Test@12345")
+    assert hasher.hash_password("Test@1234") != stored  # salted
+
+def test_legacy_sha256_password(hasher):
+    stored = hashlib.sha256("Test@1234".encode()).hexdigest()
+    assert hasher.verify_password(stored, "Test@1234")
+    assert not hasher.verify_password(stored, "wrong")
+
+def test_needs_rehash(hasher):
+    assert not hasher.needs_rehash(hasher.hash_password("Test@1234"))
+    assert hasher.needs_rehash(hashlib.sha256("Test@1234".encode()).hexdigest())
+    # scrypt hashes made with older parameters are upgraded too
+    assert hasher.needs_rehash(f"scrypt${2 ** 10}$8$1${'00' * 16}${'00' * 64}")
@@ -51,3 +51,59 @@ def test_ga_planner_capacity():
     
     for sid, count in shelter_assignments.items():
         assert count <= 100
+
+def test_ga_batch_fitness_matches_formula():
+    G = nx.Graph()
+    for i in range(6): G.add_node(i, x=i, y=0)
+    for i in range(5): G.add_edge(i, i + 1, length=100.0)
+
+    at_risk_nodes = [
+        {'id': i, 'pop': 10 * (i + 1), 'lat': 0.0, 'lon': float(i)} for i in range(4)
+    ]
+    safe_shelters = [
+        {'id': 'S1', 'node_id': 4, 'capacity': 30, 'lat': 0.0, 'lon': 4.0},
+        {'id': 'S2', 'node_id': 5, 'capacity': 60, 'lat': 0.0, 'lon': 5.0}
+    ]
+
+    planner = GeneticEvacuationPlanner(at_risk_nodes, safe_shelters, G, pop_size=10, generations=1)
+    population = planner._init_population()
+    scores = planner._fitness_batch(population)
+
+    # Per-chromosome reference: pop × (dist + 0.5 × time) + quadratic overflow penalty
+    for chrom, score in zip(population, scores):
+        cost, load = 0.0, {}
+        for i, j in enumerate(chrom):
+            pop = at_risk_nodes[i]['pop']
+            cost += pop * (planner.dist_matrix[i, j] + 0.5 * planner.time_matrix[i, j])
+            load[j] = load.get(j, 0) + pop
+        for j, people in load.items():
+            cost += max(0, people - safe_shelters[j]['capacity']) ** 2 * planner.CAPACITY_PENALTY
+        assert score == pytest.approx(cost, rel=1e-6)
+
+def test_ga_worker_pools_match_in_process_run():
+    G = nx.grid_2d_graph(6, 6)
+    G = nx.relabel_nodes(G, {(i, j): 6 * i + j for i, j in G.nodes()})
+    for n in G.nodes():
+        G.nodes[n]['x'], G.nodes[n]['y'] = float(n % 6), float(n // 6)
+    for u, v in G.edges():
+        G.edges[u, v]['length'] = 100.0 + 7 * ((u * 31 + v * 17) % 11)
+
+    at_risk_nodes = [
+        {'id': n, 'pop': 5 + n % 7, 'lat': float(n // 6), 'lon': float(n % 6)} for n in range(0, 36, 3)
+    ]
+    safe_shelters = [
+        {'id': f'S{k}', 'node_id': n, 'capacity': 25, 'lat': float(n // 6), 'lon': float(n % 6)}
+        for k, n in enumerate((5, 20, 33))
+    ]
+
+    def run(**workers):
+        planner = GeneticEvacuationPlanner(at_risk_nodes, safe_shelters, G, pop_size=40,
+                                           generations=20, seed=3, **workers)
+        plan = planner.run()
+        # Pools are shut down and the shared cost table released
+        assert planner._link_cost_shm is None
+        return planner.best_fitness, [(m['from_node'], m['to_shelter']) for m in plan]
+
+    in_process = run()
+    assert run(fitness_workers=2) == in_process
+    assert run(island_workers=2) == in_process
@@ -2,7 +2,11 @@ import pytest
 import geopandas as gpd
 import pandas as pd
 import numpy as np
-from shapely.geometry import LineString
+import networkx as nx
+import importlib.util
+from pathlib import Path
+from shapely.geometry import LineString, Point
+from shapely.ops import unary_union
 from flood_simulator import create_elevation_grid, DynamicFloodSimulator
 
 @pytest.fixture
@@ -22,3 +26,104 @@ def test_flood_simulator_initialization(dummy_edges):
     sim = DynamicFloodSimulator(elev_gdf, dummy_edges, nodes, "StationX", 0, 0, initial_people=10)
     assert sim.people_gdf is not None
     assert len(sim.people_gdf) == 10
+
+
+# The backend simulator shares this module's name, so load it under an alias
+_spec = importlib.util.spec_from_file_location(
+    "backend_flood_simulator",
+    Path(__file__).resolve().parents[1] / "UrbanFloodReact" / "backend" / "flood_simulator.py")
+backend_flood_simulator = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(backend_flood_simulator)
+
+
+def _flooded_graph(coords, depth=1.0):
+    G = nx.MultiDiGraph(crs="EPSG:4326")
+    for i, (x, y) in enumerate(coords):
+        G.add_node(i, x=x, y=y, water_depth=depth)
+    return G
+
+
+@pytest.mark.parametrize("coords, tolerance", [
+    ([(77.5900, 12.9700), (77.5910, 12.9700)], 0.0001),  # small extent, fine raster
+    ([(76.0, 12.0), (78.0, 14.0)], 0.002),               # 2° apart, cell capped by FLOOD_RASTER_MAX_CELLS
+])
+def test_flood_impact_raster_covers_every_flooded_node(coords, tolerance):
+    sim = backend_flood_simulator.UrbanFloodSimulator(_flooded_graph(coords))
+    flood_gdf = sim.calculate_flood_impact()['flood_gdf']
+
+    assert list(flood_gdf['intensity']) == [0.2, 0.6]
+    radius = 0.0003 + 1.0 * 0.00005
+    disks = unary_union([Point(x, y).buffer(radius) for x, y in coords])
+    for geom in flood_gdf.geometry:
+        # Every flooded node is covered, and the outline stays within a
+        # raster cell of the exact disk union
+        assert all(geom.contains(Point(x, y)) for x, y in coords)
+        assert geom.within(disks.buffer(tolerance))
+        assert disks.buffer(-tolerance).is_empty or geom.contains(disks.buffer(-tolerance))
+
+
+def _reference_flood_step(G, decay_factor=0.5):
+    """The original per-node, per-neighbour propagation loop"""
+    current_depths = nx.get_node_attributes(G, 'water_depth')
+    elevations = {n: G.nodes[n].get('elevation', 0.0) for n in G.nodes()}
+    new_depths = current_depths.copy()
+    for node in G.nodes():
+        if node not in current_depths or current_depths[node] <= 0.001:
+            continue
+        node_head = elevations[node] + current_depths[node]
+        lower = [(n, node_head - (elevations[n] + current_depths.get(n, 0.0)))
+                 for n in G.neighbors(node)
+                 if elevations[n] + current_depths.get(n, 0.0) < node_head]
+        total_head_diff = sum(diff for _, diff in lower)
+        for n, diff in lower:
+            amount = current_depths[node] * decay_factor * diff / total_head_diff
+            new_depths[node] -= amount
+            if n in new_depths:
+                new_depths[n] += amount
+    nx.set_node_attributes(G, new_depths, 'water_depth')
+
+
+def _slope_graph():
+    G = nx.MultiDiGraph(crs="EPSG:4326")
+    elevations = [5.0, 4.0, 4.5, 2.0, 1.0, None, 3.0]
+    for n, elev in enumerate(elevations):
+        G.add_node(n, x=77.59 + n * 0.001, y=12.97)
+        if elev is not None:
+            G.nodes[n]['elevation'] = elev
+    for u, v in [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (4, 5), (5, 6), (6, 3), (2, 1)]:
+        G.add_edge(u, v)
+        G.add_edge(v, u)
+    G.add_edge(0, 1)  # parallel edge
+    G.add_edge(3, 3)  # self-loop
+    G.add_node(7, x=77.6, y=12.96, elevation=0.0)
+    G.add_edge(4, 7)
+    return G
+
+
+def test_propagate_flood_step_matches_reference_loop():
+    sim_graph, ref_graph = _slope_graph(), _slope_graph()
+    sim = backend_flood_simulator.UrbanFloodSimulator(sim_graph, drain_nodes=[0, 2])
+
+    sim.initialize_from_drains(50)
+    del sim_graph.nodes[7]['water_depth']  # a node the flood never reaches
+    nx.set_node_attributes(ref_graph, dict(sim_graph.nodes(data='water_depth', default=None)), 'water_depth')
+    del ref_graph.nodes[7]['water_depth']
+
+    def assert_same_depths():
+        for n in sim_graph.nodes():
+            assert sim_graph.nodes[n].get('water_depth') == pytest.approx(
+                ref_graph.nodes[n].get('water_depth'), abs=1e-12)
+
+    for _ in range(6):
+        sim.propagate_flood_step(decay_factor=0.5)
+        _reference_flood_step(ref_graph, decay_factor=0.5)
+        assert_same_depths()
+    assert 'water_depth' not in sim_graph.nodes[7]
+
+    # Re-initialising must drop the cached depths from the previous run
+    sim.initialize_flood(20)
+    nx.set_node_attributes(ref_graph, 20 / 1000.0, 'water_depth')
+    for _ in range(3):
+        sim.propagate_flood_step(decay_factor=0.3)
+        _reference_flood_step(ref_graph, decay_factor=0.3)
+        assert_same_depths()
@@ -1,8 +1,11 @@
+import random
 import geopandas as gpd
 import networkx as nx
+import osmnx as ox
 import pytest
 from shapely.geometry import Point, LineString
-from network_utils import prepare_safe_centers
+from network_utils import prepare_safe_centers, nearest_center_routes, route_to_center
+from evacuation_router import evacuate_people_with_shortest_path
 
 @pytest.fixture
 def mock_edges():
@@ -21,3 +24,72 @@ def test_prepare_safe_centers(mock_hospitals, mock_edges):
     centers = prepare_safe_centers(mock_hospitals, None, mock_edges, flood_poly=None)
     assert not centers.empty
     assert 'center_id' in centers.columns
+
+
+@pytest.fixture
+def one_way_grid():
+    """3x3 grid (100 m spacing) of one-way and two-way streets with parallel
+    edges; node 9 is reachable only from node 8, so it cannot reach a center"""
+    rng = random.Random(7)
+    G = nx.MultiDiGraph(crs="EPSG:3857")
+    for n in range(9):
+        G.add_node(n, x=(n % 3) * 100.0, y=(n // 3) * 100.0)
+    G.add_node(9, x=400.0, y=400.0)
+    streets = [(0, 1), (1, 2), (3, 4), (4, 5), (6, 7), (7, 8),
+               (0, 3), (3, 6), (1, 4), (4, 7), (2, 5), (5, 8)]
+    for i, (u, v) in enumerate(streets):
+        G.add_edge(u, v, length=rng.uniform(50, 150))
+        if i % 4:  # every fourth street is one-way
+            G.add_edge(v, u, length=rng.uniform(50, 150))
+    G.add_edge(4, 5, length=rng.uniform(50, 150))  # parallel edge
+    G.add_edge(8, 9, length=100.0)
+    for u, v, k, data in G.edges(keys=True, data=True):
+        data['travel_time'] = data['length']
+    return G
+
+@pytest.fixture
+def grid_centers():
+    # B snaps to the same node as A, which keeps it
+    return gpd.GeoDataFrame({
+        'center_id': ['A', 'B', 'C'],
+        'geometry': [Point(0, 0), Point(5, 5), Point(200, 200)],
+    }, crs="EPSG:3857")
+
+def _snap(G, point):
+    return ox.distance.nearest_nodes(G, point.x, point.y)
+
+def test_nearest_center_routes_match_shortest_path(one_way_grid, grid_centers):
+    G = one_way_grid
+    log = []
+    center_at_node, dist, next_hop = nearest_center_routes(G, grid_centers, _snap, log)
+
+    assert center_at_node == {0: 'A', 8: 'C'}
+    assert 9 not in dist
+    for node in range(9):
+        expected = min(nx.shortest_path_length(G, node, c, weight='travel_time')
+                       for c in center_at_node if nx.has_path(G, node, c))
+        assert dist[node] == pytest.approx(expected)
+        path = route_to_center(next_hop, node)
+        assert path[-1] in center_at_node
+        assert path == nx.shortest_path(G, node, path[-1], weight='travel_time')
+
+def test_shortest_path_evacuation_destinations_and_times(one_way_grid, grid_centers):
+    G = one_way_grid
+    people = gpd.GeoDataFrame({
+        'person_id': [1, 2, 3, 4],
+        'geometry': [Point(100, 0), Point(0, 100), Point(100, 200), Point(400, 400)],
+    }, crs="EPSG:3857")
+    result = evacuate_people_with_shortest_path(G, people, grid_centers, walking_speed_kmph=5)
+
+    # Person 4 stands on node 9, which has no way out
+    assert result['unreachable'] == [Point(400, 400)]
+    routes = {r['person_id']: r for r in result['routes']}
+    assert sorted(routes) == [1, 2, 3]
+    assert {pid: r['destination'] for pid, r in routes.items()} == {1: 'C', 2: 'A', 3: 'C'}
+    for pid, origin in ((1, 1), (2, 3), (3, 7)):
+        route = routes[pid]
+        target = 0 if route['destination'] == 'A' else 8
+        assert route['path'] == nx.shortest_path(G, origin, target, weight='travel_time')
+        assert route['time'] == pytest.approx(
+            nx.shortest_path_length(G, origin, target, weight='length') / (5 * 1000 / 60))
+    assert result['times'] == [routes[pid]['time'] for pid in (1, 2, 3)]